@@ -0,0 +1,89 @@
+# bench_eval.py — steps/s of the candidate evaluation paths
+#
+# Runs the same search (container, seed, branching, hole4, stats level, TT size) with
+# per-candidate evaluation, --lattice-bits and --batch-eval in interleaved rounds, checks
+# that every path makes the same placements, and prints each path's median rate (CPU time)
+# and its median per-round speedup over per-candidate evaluation.
+#
+#   python bench_eval.py ../../data/containers/Shape_1.json --hole4
+#   python bench_eval.py ../../data/containers/hollowpyramid.py.json --branching cell-first --stats-level full
+
+from __future__ import annotations
+import argparse, hashlib, statistics, sys, time
+from typing import Dict, List, Tuple
+
+import solver
+
+PATHS = {
+    "scalar":  {},
+    "lattice": {"lattice_bits": True},
+    "batch":   {"batch_eval": True},
+}
+
+def run_path(args, eng_mod, pieces, valid_set, problem, path: str) -> Tuple[float, str]:
+    """(steps per CPU second, digest of the placement after every step) for one path."""
+    eng = solver.build_engine(eng_mod.SolverEngine, pieces, valid_set, rng_seed=args.rng_seed,
+                              hole4=args.hole4, tt_mb=args.tt_mb, branching=args.branching,
+                              stats_level=args.stats_level, problem=problem, **PATHS[path])
+    h = hashlib.sha1()
+    t0 = time.process_time()
+    n = 0
+    while n < args.steps:
+        progressed, solved = eng.step_once()
+        n += 1
+        h.update(eng.placements.tobytes())
+        if solved:
+            eng.resume_after_solution()
+        elif not progressed:
+            break
+    return n / max(1e-9, time.process_time() - t0), h.hexdigest()
+
+def main():
+    p = argparse.ArgumentParser(description="Compare the candidate evaluation paths in steps/s.")
+    p.add_argument("container", help="Container JSON.")
+    p.add_argument("--paths", default="scalar,lattice,batch",
+        help="Comma-separated paths to run (scalar, lattice, batch; default: all three).")
+    p.add_argument("--steps", type=int, default=4000, help="step_once calls per run (default: 4000).")
+    p.add_argument("--rounds", type=int, default=7, help="Interleaved rounds per path (default: 7).")
+    p.add_argument("--rng-seed", type=int, default=1)
+    p.add_argument("--hole4", action="store_true")
+    p.add_argument("--branching", choices=("piece-first", "cell-first"), default="piece-first")
+    p.add_argument("--stats-level", choices=("off", "counters", "full"), default="off")
+    p.add_argument("--tt-mb", type=float, default=64)
+    args = p.parse_args()
+
+    paths = [s.strip() for s in args.paths.split(",") if s.strip()]
+    for path in paths:
+        if path not in PATHS:
+            p.error(f"unknown path {path!r} (choose from {', '.join(PATHS)})")
+
+    container = solver.load_json(args.container)
+    valid_set = set(tuple(c) for c in container["cells"])
+    pieces = solver.extract_pieces(solver.load_py_module(solver.PIECES_PATH, "pieces_module"))
+    eng_mod = solver.load_py_module(solver.ENGINE_PATH, "engine_module")
+    if "batch" in paths and eng_mod.np is None:
+        p.error("the batch path needs numpy")
+    problem = eng_mod.PreparedProblem(pieces, valid_set)
+
+    # warm-up builds the problem's lazy tables, so no path pays for them inside a round
+    digests = {path: run_path(args, eng_mod, pieces, valid_set, problem, path)[1] for path in paths}
+    rates: Dict[str, List[float]] = {path: [] for path in paths}
+    for _ in range(max(1, args.rounds)):
+        for path in paths:
+            rate, digest = run_path(args, eng_mod, pieces, valid_set, problem, path)
+            if digest != digests[path]:
+                sys.exit(f"[bench] {path}: run is not deterministic")
+            rates[path].append(rate)
+
+    base = paths[0]
+    print(f"[bench] {args.container} | {args.branching} | hole4={args.hole4} | stats={args.stats_level} | "
+          f"{args.steps} steps x {args.rounds} rounds")
+    for path in paths:
+        speedup = statistics.median(r / b for r, b in zip(rates[path], rates[base]))
+        same = "same placements" if digests[path] == digests[base] else "DIFFERENT placements"
+        print(f"  {path:<8} {statistics.median(rates[path]):>9.0f} steps/s  {speedup:5.2f}x  {same}")
+    if len(set(digests.values())) > 1:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 # solver.py — FCC tetra-spheres puzzle driver
+# rev 3.11 — tree-split parallel DFS with work stealing (--split-depth D)
+# rev 3.10 — multi-process portfolio (--jobs N) with central dedup
 # rev 3.9 — fresh-engine-per-run, snapshots (atomic + retry, non-blocking), deterministic shuffle,
 #           opener rotation, stall windows, hole4 pruning (optional / conditional),
 #           layered ASCII/JSON outputs, and console progress echo.
 
 from __future__ import annotations
-import argparse, json, os, time, hashlib, importlib.util, importlib.machinery
+import argparse, json, os, sys, time, hashlib, importlib, importlib.util, importlib.machinery
+import multiprocessing, queue as queue_mod, signal, pickle, struct, zlib, math, random, threading, atexit
+from array import array
 from collections import deque
 from typing import Dict, List, Tuple, Set
 
@@ -19,6 +23,10 @@ LOGS_DIR          = os.path.join(ROOT, "logs")
 PROGRESS_PATH     = os.path.join(LOGS_DIR, "progress.json")
 PROGRESS_STREAM   = os.path.join(LOGS_DIR, "progress.jsonl")
 
+# Progress writer thread: queue bound (plain progress events beyond it are dropped) and flush period
+PROGRESS_QUEUE_MAX = 1024
+PROGRESS_FLUSH_SEC = 0.5
+
 def ensure_dir(p: str):
     if not os.path.isdir(p):
         os.makedirs(p, exist_ok=True)
@@ -130,6 +138,10 @@ def _canonicalize_cells(cells: List[Tuple[int,int,int]]):
             best_delta = (mi, mj, mk)
     return best, best_rot, best_delta, best_str  # best_str is the canonical serialization
 
+def container_cid_sha256(cells) -> str:
+    """Canonical container CID (same value write_world_json records)."""
+    return _sha256_hex(_canonicalize_cells([tuple(c) for c in cells])[3])
+
 def _sha256_hex(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
@@ -174,7 +186,7 @@ def write_world_json(engine, dst_path: str, container_path: str, container_name:
             "frame": { "R": [[1.0,0.0,0.0],[0.0,1.0,0.0],[0.0,0.0,1.0]], "t": [0.0,0.0,0.0] }
         },
         "r": r,
-        "pieces_order": [pl["piece"] for pl in engine.placements],
+        "pieces_order": [engine.placement_piece(pl) for pl in engine.placements],
         "pieces": [],
         "depth": engine.placed_count(),
         "timestamp": time.time()
@@ -189,18 +201,19 @@ def write_world_json(engine, dst_path: str, container_path: str, container_name:
     # Build pieces section (original presentation) and collect canonicalized per-piece cells for SIDs
     piece_to_cells_canon: Dict[str, List[Tuple[int,int,int]]] = {}
     for pl in engine.placements:
-        cells_idx = pl["cells_idx"]
+        piece = engine.placement_piece(pl)
+        cells_idx = engine.placement_cells(pl)
         cells_ijk = [list(idx2cell[i]) for i in cells_idx]
         world_centers = [ijk_to_world(i, j, k, r) for (i, j, k) in cells_ijk]
         data["pieces"].append({
-            "id": pl["piece"],
+            "id": piece,
             "cells_ijk": cells_ijk,
             "world_centers": world_centers
         })
         # canonicalize this piece's cells using the container's chosen rotation+delta
         cells_raw = [tuple(idx2cell[i]) for i in cells_idx]
         cells_canon = _transform_cells(cells_raw, chosen_rot, delta)
-        piece_to_cells_canon[pl["piece"]] = cells_canon
+        piece_to_cells_canon[piece] = cells_canon
 
     # --- SID.state (order-agnostic final arrangement) ---
     # Serialize piece map with piece ids sorted; each piece's 4 cells sorted (already)
@@ -256,8 +269,8 @@ def write_world_layers_str(engine, container_cid_sha256=None, sid_state_sha256=N
     idx2cell = engine.idx2cell
     cell_to_piece = {}
     for pl in engine.placements:
-        pid = pl["piece"]
-        for ci in pl["cells_idx"]:
+        pid = engine.placement_piece(pl)
+        for ci in engine.placement_cells(pl):
             cell_to_piece[idx2cell[ci]] = pid
 
     all_uvws = []
@@ -349,42 +362,184 @@ def safe_snapshot(args, engine):
     except Exception:
         pass
 
-# ---------- progress emitters ----------
-def make_emit_progress(tail_deque: deque):
-    ensure_dir(LOGS_DIR)
+# ---------- checkpoints (--checkpoint-interval / --resume) ----------
+# File: header (magic, format version, problem layout hash) + zlib(pickle(payload)).
+CHECKPOINT_MAGIC   = b"BPCHECKP"
+CHECKPOINT_VERSION = 2
+_CHECKPOINT_HEADER = struct.Struct("<8sIQ")
+
+# Options a resumed run takes from the checkpoint so the search continues unchanged
+RESUME_ARGS = (
+    "container", "engine", "branching", "rng_seed", "shuffle_pieces", "try_openers", "max_results",
+    "hole4", "hole4_conditional", "decompose", "colour_check", "forward_check", "tt_mb", "lattice_bits", "batch_eval", "symmetry_break", "stats_level",
+    "restart_on_stall", "stall_below_23", "stall_at_23", "stall_at_24",
+)
+
+def write_checkpoint(path: str, layout: int, args, driver_state: dict, engine_state: dict):
+    payload = {
+        "args": {k: getattr(args, k) for k in RESUME_ARGS},
+        "driver": driver_state,
+        "engine": engine_state,
+    }
+    blob = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, layout))
+        f.write(blob)
+    if not _atomic_replace(tmp, path):
+        try: os.remove(tmp)
+        except Exception: pass
 
-    def emit_progress_to_streams(payload: dict, tail: deque):
-        # stream line
-        with open(PROGRESS_STREAM, "a", encoding="utf-8") as f:
-            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-        # tail mem
-        tail.append(payload)
-        # overwrite summary
-        summary = payload.copy()
+def read_checkpoint(path: str) -> Tuple[int, dict]:
+    """(layout hash, payload); ValueError if the file is not a checkpoint of this version."""
+    with open(path, "rb") as f:
+        head = f.read(_CHECKPOINT_HEADER.size)
+        if len(head) < _CHECKPOINT_HEADER.size:
+            raise ValueError("truncated header")
+        magic, version, layout = _CHECKPOINT_HEADER.unpack(head)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"not a version {CHECKPOINT_VERSION} checkpoint")
         try:
-            aps_val = round(payload.get("attempts_per_sec", 0), 1)
-        except Exception:
-            aps_val = payload.get("attempts_per_sec", 0)
-        summary["attempts_per_sec"] = aps_val
-        with open(PROGRESS_PATH, "w", encoding="utf-8") as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+            payload = pickle.loads(zlib.decompress(f.read()))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+            raise ValueError(f"corrupt checkpoint: {e}")
+    return layout, payload
 
-        # console echo (concise)
-        try:
+# ---------- progress emitters ----------
+def _echo_progress(payload: dict):
+    """Concise console line for a progress event."""
+    if payload.get("event") != "progress":
+        return
+    placed = payload.get("placed", 0)
+    best   = payload.get("best_depth", placed)
+    total  = payload.get("total", 25)
+    aps    = payload.get("attempts_per_sec", 0)
+    run    = payload.get("run", 0)
+    seed   = payload.get("seed", "")
+    status = payload.get("status", "")
+    line = f"[run {run} seed={seed}] placed {placed}/{total} | best {best} | rate {aps}/s"
+    if status:
+        line += f" | {status}"
+    print(line, flush=True)
+
+class ProgressWriter:
+    """
+    Writes progress events to progress.jsonl / progress.json / console on a daemon thread,
+    so the search never waits on the disk. put() never blocks: plain progress events go to a
+    bounded queue and are dropped when it is full (the next one supersedes them); run-end and
+    stats events that find it full go to an unbounded overflow deque the thread drains after
+    the queue. The thread keeps progress.jsonl open and flushes it every PROGRESS_FLUSH_SEC,
+    merges consecutive plain progress events of the same run that arrive together (best-depth
+    bursts), and rewrites progress.json once per batch with _atomic_write. close() drains and
+    joins; it is registered with atexit, which also runs on SIGTERM since main() turns that
+    signal into SystemExit.
+    """
+
+    def __init__(self, tail: deque):
+        ensure_dir(LOGS_DIR)
+        self.tail = tail
+        self.dropped = 0
+        self.coalesced = 0
+        self._q: queue_mod.Queue = queue_mod.Queue(maxsize=PROGRESS_QUEUE_MAX)
+        self._overflow: deque = deque()
+        self._stream = open(PROGRESS_STREAM, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._loop, name="progress-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _plain(payload: dict) -> bool:
+        return payload.get("event") == "progress" and "status" not in payload
+
+    def put(self, payload: dict):
+        if not self._overflow:
+            try:
+                self._q.put_nowait(payload)
+                return
+            except queue_mod.Full:
+                pass
+        # queue full (or overflow pending, so keep order): run-end / stats events are never dropped
+        if self._plain(payload):
+            self.dropped += 1
+        else:
+            self._overflow.append(payload)
+
+    def _loop(self):
+        last_flush = time.monotonic()
+        dirty = False
+        done = False
+        while not done:
+            try:
+                batch = [self._q.get(timeout=PROGRESS_FLUSH_SEC)]
+            except queue_mod.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue_mod.Empty:
+                    break
+            while self._overflow:
+                batch.append(self._overflow.popleft())
+            if None in batch:
+                done = True
+                batch = batch[:batch.index(None)]
+            if batch:
+                self._write(batch)
+                dirty = True
+            now = time.monotonic()
+            if dirty and (done or now - last_flush >= PROGRESS_FLUSH_SEC):
+                self._stream.flush()
+                last_flush = now
+                dirty = False
+        self._stream.close()
+
+    def _write(self, batch: List[dict]):
+        kept: List[dict] = []
+        for payload in batch:
+            prev = kept[-1] if kept else None
+            if (prev is not None and self._plain(payload) and self._plain(prev)
+                    and all(prev.get(k) == payload.get(k) for k in ("run", "seed", "job"))):
+                kept[-1] = payload
+                self.coalesced += 1
+            else:
+                kept.append(payload)
+        summary = None
+        for payload in kept:
+            self._stream.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            self.tail.append(payload)
             if payload.get("event") == "progress":
-                placed = payload.get("placed", 0)
-                best   = payload.get("best_depth", placed)
-                total  = payload.get("total", 25)
-                aps    = payload.get("attempts_per_sec", 0)
-                run    = payload.get("run", 0)
-                seed   = payload.get("seed", "")
-                status = payload.get("status", "")
-                line = f"[run {run} seed={seed}] placed {placed}/{total} | best {best} | rate {aps}/s"
-                if status:
-                    line += f" | {status}"
-                print(line, flush=True)
-        except Exception:
-            pass
+                summary = payload
+            try:
+                _echo_progress(payload)
+            except Exception:
+                pass
+        if summary is not None:
+            summary = summary.copy()
+            try:
+                summary["attempts_per_sec"] = round(summary.get("attempts_per_sec", 0), 1)
+            except Exception:
+                pass
+            try:
+                _atomic_write(PROGRESS_PATH, json.dumps(summary, ensure_ascii=False, indent=2))
+            except OSError:
+                pass
+
+    def close(self):
+        if self._thread.is_alive():
+            try:
+                self._q.put_nowait(None)
+            except queue_mod.Full:
+                self._overflow.append(None)
+            self._thread.join()
+
+def make_emit_progress(tail_deque: deque, sink=None):
+    """
+    Returns emit_progress(engine, run_idx, seed_label, aps=0.0, placed_only=False).
+    Payloads go to a ProgressWriter (progress.jsonl / progress.json / console), or to
+    sink(payload) if given (portfolio workers forward them to the parent instead of
+    touching the log files). emit_progress.to_streams(payload) enqueues a ready payload.
+    """
+    writer = ProgressWriter(tail_deque) if sink is None else None
 
     def emit_progress(engine, run_idx, seed_label, aps=0.0, placed_only=False):
         cur = engine.placed_count()
@@ -401,7 +556,12 @@ def make_emit_progress(tail_deque: deque):
         }
         if placed_only:
             payload = {"event":"progress","run":run_idx,"placed":cur,"best_depth":best}
-        emit_progress_to_streams(payload, tail_deque)
+        if sink is not None:
+            sink(payload)
+        else:
+            writer.put(payload)
+    emit_progress.to_streams = writer.put if writer is not None else sink
+    emit_progress.writer = writer
     return emit_progress
 
 # ---------- engine builder (fresh per attempt) ----------
@@ -411,15 +571,43 @@ def build_engine(SolverEngine,
                  rng_seed=None,
                  shuffle="none",
                  rotate_first=0,
-                 hole4=True):
+                 hole4=True,
+                 tt_mb=None,
+                 lattice_bits=False,
+                 batch_eval=False,
+                 branching="piece-first",
+                 stats_level=None,
+                 symmetry=False,
+                 problem=None,
+                 refuted=None,
+                 refuted_log=None,
+                 decompose=False,
+                 colour_check=False,
+                 forward_check=False):
     """
     Construct a fresh engine configured for this attempt:
+      - reuses `problem` (PreparedProblem: grid, fits, Zobrist keys) when given,
+        so only per-run search state is allocated
+      - consults and extends `refuted` (proven dead states; kept across runs, or shared
+        between processes as a SharedTranspositionTable); the heuristic TT is per engine
+      - appends new proven dead states to `refuted_log` (a NogoodLog's pending list)
+      - optional decomposition: fill disconnected empty components one at a time (cell-first)
+      - optional colour-count prune (empty cells per sublattice class vs. the remaining pieces)
+      - optional forward checking (live placements per cell / per piece; prune at 0, force at 1)
+      - sizes the transposition table (tt_mb, MiB; None = engine default)
       - sets RNG_SEED (if supported)
       - deterministic piece order via engine._shuffle_order(shuffle)
       - optional rotation of the opening piece
       - toggles hole_mod4 pruning
+      - optionally switches pruning/heuristic checks to the padded lattice bitboard
+      - optionally evaluates candidates in NumPy batches (same choices, needs numpy)
+      - branching mode: "piece-first" (fixed order) or "cell-first" (MRV cell, dynamic piece)
+      - instrumentation tier: "off" / "counters" / "full" (None = engine default, off)
+      - optional root symmetry breaking over the container's automorphisms
     """
-    eng = SolverEngine(pieces, valid_set)
+    eng = SolverEngine(pieces, valid_set, tt_mb=tt_mb, stats_level=stats_level, problem=problem,
+                       refuted=refuted)
+    eng.refuted_log = refuted_log
 
     # Seed
     try:
@@ -445,12 +633,42 @@ def build_engine(SolverEngine,
     except Exception:
         pass
 
-    # Hole-mod-4 pruning
+    # Hole-mod-4 pruning (+ incremental empty-component tracking behind it)
     try:
         eng.hole_mod4 = bool(hole4)
+        if hole4:
+            eng.enable_component_tracking()
     except Exception:
         pass
 
+    # Component decomposition (enables component tracking when hole4 did not)
+    if decompose:
+        eng.enable_decomposition()
+
+    # Colour-count prune (stays off unless the pieces exactly cover the container)
+    if colour_check:
+        eng.enable_colour_check()
+
+    # Forward checking (counters are built from the current board)
+    if forward_check:
+        eng.enable_forward_check()
+
+    # Padded lattice bitboard checks
+    if lattice_bits:
+        eng.enable_lattice_bits()
+
+    # NumPy-batched candidate evaluation
+    if batch_eval:
+        eng.enable_batch_eval()
+
+    # Branching mode
+    if hasattr(eng, "branching"):
+        eng.branching = branching
+
+    # Root symmetry breaking
+    if symmetry:
+        eng.enable_symmetry_breaking()
+
     return eng
 
 # ---------- empties%4 gate helper ----------
@@ -458,6 +676,8 @@ def _empties_mod4_ok_now(engine) -> bool:
     """Return True if engine thinks current empty-region sizes are all %4==0.
        If the method/field isn't available, return True (don't block)."""
     try:
+        if hasattr(engine, "_empties_mod4_ok_now"):
+            return bool(engine._empties_mod4_ok_now())
         return bool(engine._empties_mod4_ok(engine.occ_bits))
     except Exception:
         return True
@@ -468,21 +688,36 @@ def run_once_with_engine(engine,
                          seed_label,
                          effective_stall_limit_fn,
                          emit_progress,
-                         args):
+                         args,
+                         stop_event=None,
+                         checkpoint=None,
+                         since_improve=0.0,
+                         nogood_log=None):
     """
     Returns: (status, progressed_any)
-      status ∈ {"solved", "exhausted_root", "stalled_or_exhausted"}
+      status ∈ {"solved", "exhausted_root", "stalled_or_exhausted", "stopped"}
+    The engine steps in batches (engine.run) that end at a solution, a new best depth,
+    exhaustion, or the next moment the driver has work to do (log, stop poll, stall).
+    stop_event (multiprocessing.Event, optional) is polled a few times per second.
+    checkpoint(engine, since_improve) is called every --checkpoint-interval seconds;
+    since_improve starts the stall window part-way (resumed runs). nogood_log (NogoodLog)
+    passes on the proven dead states found so far every few seconds.
     """
     from time import monotonic
 
     LOG_PERIOD = 5.0
+    STOP_POLL = 0.25
+    BATCH_STEPS = 4096
     last_log_t = monotonic()
+    last_stop_poll = last_log_t
     prev_t = last_log_t
     prev_att = getattr(engine, "attempts", 0)
 
-    # Snapshot cadence
+    # Snapshot / checkpoint cadence
     last_snap_t = monotonic()
     SNAP_IVL = args.snapshot_interval
+    last_ckpt_t = last_snap_t
+    CKPT_IVL = getattr(args, "checkpoint_interval", None)
 
     # hole4 conditional gate: start with hole4 OFF if requested
     deferred_hole4 = False
@@ -507,18 +742,36 @@ def run_once_with_engine(engine,
 
     progressed_any = False
     last_best = getattr(engine, "best_depth_ever", engine.placed_count())
-    last_improve_t = monotonic()
+    last_improve_t = monotonic() - since_improve
 
     while True:
-        progressed_step, solved = engine.step_once()
-        if progressed_step:
+        # run until the next log / stop poll / stall deadline (one step at a time while hole4 is gated)
+        wake = last_log_t + LOG_PERIOD
+        if stop_event is not None:
+            wake = min(wake, last_stop_poll + STOP_POLL)
+        stall_limit = effective_stall_limit_fn(last_best)
+        if stall_limit is not None:
+            wake = min(wake, last_improve_t + stall_limit)
+        batch = engine.run(max_steps=1 if deferred_hole4 else BATCH_STEPS, deadline=wake)
+        solved = batch.solved
+        if batch.steps > 1 or not batch.exhausted:
             progressed_any = True
+        if batch.exhausted and getattr(engine, "exhausted", False):
+            # exact engines prove exhaustion; no point waiting for a stall window
+            emit_progress(engine, run_idx, seed_label, aps=0.0)
+            return "exhausted_root", progressed_any
 
         now = monotonic()
         attempts = getattr(engine, "attempts", 0)
         dt = max(1e-6, now - prev_t)
         aps = int((attempts - prev_att) / dt)
 
+        # external stop (portfolio parent has enough results)
+        if stop_event is not None and now - last_stop_poll >= STOP_POLL:
+            last_stop_poll = now
+            if stop_event.is_set():
+                return "stopped", progressed_any
+
         # Enable hole4 once empties are safe (if gated)
         if deferred_hole4:
             if _empties_mod4_ok_now(engine):
@@ -528,6 +781,9 @@ def run_once_with_engine(engine,
                 except Exception:
                     deferred_hole4 = False
 
+        if nogood_log is not None:
+            nogood_log.tick()
+
         # periodic log + snapshot
         if now - last_log_t >= LOG_PERIOD:
             emit_progress(engine, run_idx, seed_label, aps=aps)
@@ -537,6 +793,9 @@ def run_once_with_engine(engine,
             if SNAP_IVL is not None and (now - last_snap_t) >= SNAP_IVL:
                 safe_snapshot(args, engine)
                 last_snap_t = now
+            if checkpoint is not None and CKPT_IVL is not None and (now - last_ckpt_t) >= CKPT_IVL:
+                checkpoint(engine, now - last_improve_t)
+                last_ckpt_t = now
 
         # on best-depth improvement
         cur_best2 = getattr(engine, "best_depth_ever", engine.placed_count())
@@ -558,6 +817,736 @@ def run_once_with_engine(engine,
                 return "exhausted_root", progressed_any
             return "stalled_or_exhausted", progressed_any
 
+# ---------- per-seed driver (shared by the sequential loop and portfolio workers) ----------
+def make_stall_limit(args):
+    def effective_stall_limit(best_depth: int):
+        if args.stall_at_24 is not None and best_depth >= 24:
+            return args.stall_at_24
+        if args.stall_at_23 is not None and best_depth >= 23:
+            return args.stall_at_23
+        if args.stall_below_23 is not None and best_depth < 23:
+            return args.stall_below_23
+        return args.restart_on_stall
+    return effective_stall_limit
+
+def solve_seed(args, SolverEngine, pieces, valid_set, problem, run_idx, run_seed,
+               emit_progress, on_solved, stop_event=None, opener_offset=0, refuted=None,
+               checkpoint=None, resume=None, nogood_log=None):
+    """
+    One seed: fresh engine per attempt, rotating the opener on root exhaustion.
+    on_solved(engine) is called for a complete placement.
+    checkpoint(engine, run_idx, tried, since_improve, fresh) saves resumable state
+    (fresh: attempt `tried` restarts from scratch with a new engine); resume is
+    that saved driver state, used for the first attempt. Engines log new proven dead
+    states to nogood_log (NogoodLog, --nogood-db).
+    Returns (status, engine, solved) for the last attempt.
+    """
+    seed_label = ("default" if run_seed is None else run_seed)
+    stall_limit = make_stall_limit(args)
+
+    tried = 0
+    # DLX and cell-first branching ignore piece order, so rotating the opener cannot help
+    if args.engine == "dlx" or args.branching == "cell-first":
+        max_try_openers = 0
+        opener_offset = 0
+    else:
+        max_try_openers = max(0, int(args.try_openers))
+
+    since_improve = 0.0
+    if resume is not None:
+        tried = resume["tried"]
+        since_improve = resume["since_improve"]
+
+    while True:
+        # fresh engine for this attempt
+        engine = build_engine(
+            SolverEngine,
+            pieces,
+            valid_set,
+            rng_seed=run_seed,
+            shuffle=args.shuffle_pieces,
+            rotate_first=tried + opener_offset,
+            hole4=args.hole4,
+            tt_mb=args.tt_mb,
+            lattice_bits=args.lattice_bits,
+            batch_eval=args.batch_eval,
+            branching=args.branching,
+            stats_level=args.stats_level,
+            symmetry=args.symmetry_break,
+            problem=problem,
+            refuted=refuted,
+            refuted_log=nogood_log.pending if nogood_log is not None else None,
+            decompose=args.decompose,
+            colour_check=args.colour_check,
+            forward_check=args.forward_check
+        )
+        if resume is not None:
+            if not resume["fresh"]:
+                engine.restore_state(resume["engine"])
+            resume = None
+
+        ckpt = None
+        if checkpoint is not None:
+            ckpt = lambda eng, since, tried=tried: checkpoint(eng, run_idx, tried, since, False)
+        status, progressed_any = run_once_with_engine(
+            engine, run_idx, seed_label, stall_limit, emit_progress, args, stop_event,
+            checkpoint=ckpt, since_improve=since_improve, nogood_log=nogood_log
+        )
+        since_improve = 0.0
+        if nogood_log is not None:
+            nogood_log.flush()
+
+        if status == "solved" and engine.placed_count() == engine.total_pieces():
+            on_solved(engine)
+            return status, engine, True
+
+        if status == "exhausted_root":
+            tried += 1
+            if tried <= max_try_openers:
+                if checkpoint is not None:
+                    checkpoint(engine, run_idx, tried, 0.0, True)
+                continue
+        # stalled mid-depth, exhausted after some depth, or stopped
+        return status, engine, False
+
+def final_events(args, engine, run_idx, seed_label, status_label) -> List[dict]:
+    """End-of-run progress event (+ stats event when --stats-level is not off)."""
+    events = [{
+        "event":"progress",
+        "run": run_idx,
+        "seed": seed_label,
+        "status": status_label,
+        "placed": engine.placed_count(),
+        "best_depth": getattr(engine, "best_depth_ever", engine.placed_count()),
+        "total": engine.total_pieces(),
+        "attempts": getattr(engine, "attempts", 0),
+        "attempts_per_sec": 0,
+    }]
+    if args.stats_level != "off":
+        stats = {"event": "stats", "run": run_idx, "seed": seed_label}
+        stats.update(engine.stats_snapshot())
+        events.append(stats)
+    return events
+
+def write_final_events(emit_progress, events: List[dict]):
+    """Queue the run-end events (the progress event becomes progress.json)."""
+    for ev in events:
+        emit_progress.to_streams(ev)
+
+def _load_problem(args):
+    """(pieces, valid_set, engine module, engine class, PreparedProblem) for args.container."""
+    container = load_json(args.container)
+    valid_set: Set[Tuple[int,int,int]] = set(tuple(c) for c in container["cells"])
+    pieces = extract_pieces(load_py_module(PIECES_PATH, "pieces_module"))
+    eng_mod = load_py_module(ENGINE_PATH, "engine_module")
+    SolverEngine = getattr(eng_mod, "DLXEngine" if args.engine == "dlx" else "SolverEngine")
+    # grid / fits / Zobrist keys depend only on pieces + container: build once for every run
+    problem = eng_mod.PreparedProblem(pieces, valid_set)
+    return pieces, valid_set, eng_mod, SolverEngine, problem
+
+def process_refuted(args, eng_mod, problem):
+    """
+    One table of proven dead states for every engine this process builds, so a region
+    refuted under one seed / opener is skipped by the next (keys ignore piece order).
+    Seeded from the nogood file (--nogood-db). None for DLX, which records nothing.
+    """
+    if args.engine == "dlx":
+        return None
+    table = eng_mod.TranspositionTable(eng_mod.DEFAULT_REFUTED_MB)
+    if getattr(args, "nogood_path", None):
+        load_nogood(args, problem, table)
+    return table
+
+# ---------- persistent nogood file (--nogood-db) ----------
+# File: header (magic, format version, problem layout hash) + one little-endian u64 per
+# proven dead state: its key with the low byte replaced by the depth it was refuted at.
+# Append-only: records are written while the search runs, never merged on exit.
+# Named by container CID and layout hash: the CID is rotation/translation invariant, while
+# the records are only valid for one cell indexing and piece set.
+NOGOOD_MAGIC      = b"BPNOGOOD"
+NOGOOD_VERSION    = 2
+DEFAULT_NOGOOD_MB = 16      # file size cap; appends stop there
+NOGOOD_FLUSH_SEC  = 5.0
+_NOGOOD_HEADER = struct.Struct("<8sIQ")
+
+def nogood_path(problem) -> str:
+    cid = container_cid_sha256(problem.idx2cell)
+    return os.path.join(RESULTS_DIR, f"{cid}.{problem.layout_hash:016x}.nogood.bin")
+
+def _read_nogood(path: str, layout: int) -> array:
+    """Records of a nogood file; ValueError unless it has this format version and layout."""
+    with open(path, "rb") as f:
+        head = f.read(_NOGOOD_HEADER.size)
+        if len(head) < _NOGOOD_HEADER.size:
+            raise ValueError("truncated header")
+        magic, version, file_layout = _NOGOOD_HEADER.unpack(head)
+        if magic != NOGOOD_MAGIC or version != NOGOOD_VERSION:
+            raise ValueError(f"not a version {NOGOOD_VERSION} nogood file")
+        if file_layout != layout:
+            raise ValueError("written for a different container/piece layout")
+        raw = f.read()
+    records = array("Q")
+    records.frombytes(raw[:len(raw) - len(raw) % 8])   # a torn last record is dropped
+    if sys.byteorder == "big":
+        records.byteswap()
+    return records
+
+def load_nogood(args, problem, table=None, announce=False) -> bool:
+    """
+    Store the records of args.nogood_path into `table` (None: only check the file).
+    False when the file is missing or unusable; the writer then starts it afresh.
+    """
+    path = args.nogood_path
+    try:
+        records = _read_nogood(path, problem.layout_hash)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        if announce:
+            print(f"[nogood] ignoring {path}: {e}", flush=True)
+        return False
+    if table is not None:
+        for w in records:
+            table.store(w, w & 0xFF)
+    if announce:
+        print(f"[nogood] {os.path.basename(path)}: {len(records)} proven dead states", flush=True)
+    return True
+
+def nogood_writer(args, problem, usable: bool):
+    """
+    sink(records) appending to args.nogood_path (restarted with a fresh header unless
+    `usable`) until the file reaches --nogood-mb. Only the main process writes.
+    """
+    path = args.nogood_path
+    cap = int((args.nogood_mb if args.nogood_mb is not None else DEFAULT_NOGOOD_MB) * (1 << 20))
+    if not usable:
+        with open(path, "wb") as f:
+            f.write(_NOGOOD_HEADER.pack(NOGOOD_MAGIC, NOGOOD_VERSION, problem.layout_hash))
+    size = os.path.getsize(path)
+    full = False
+
+    def sink(records: List[int]) -> None:
+        nonlocal size, full
+        room = max(0, (cap - size) // 8)
+        if len(records) > room:
+            records = records[:room]
+            if not full:
+                full = True
+                print(f"[nogood] {os.path.basename(path)} reached its size cap; new states are not saved", flush=True)
+        if not records:
+            return
+        buf = array("Q", records)
+        if sys.byteorder == "big":
+            buf.byteswap()
+        try:
+            with open(path, "ab") as f:
+                f.write(buf.tobytes())
+            size += 8 * len(records)
+        except OSError as e:
+            print(f"[nogood] write failed: {e}", flush=True)
+    return sink
+
+class NogoodLog:
+    """
+    Proven dead states found by this process's engines (engine.refuted_log is `pending`),
+    handed to sink(records) at most every NOGOOD_FLUSH_SEC (tick) or on flush(): appended
+    to the file by the main process, sent to the parent by workers.
+    """
+
+    def __init__(self, sink):
+        self.pending: List[int] = []
+        self.sink = sink
+        self._last = time.monotonic()
+
+    def tick(self) -> None:
+        if self.pending and time.monotonic() - self._last >= NOGOOD_FLUSH_SEC:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last = time.monotonic()
+        if self.pending:
+            records = list(self.pending)
+            del self.pending[:]    # engines keep appending to the same list
+            self.sink(records)
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
+def _worker_refuted(args, eng_mod, problem, refuted_spec):
+    """Worker side: attach to the parent's shared table of proven dead states, else build one."""
+    if refuted_spec is not None:
+        return eng_mod.SharedTranspositionTable(*refuted_spec)
+    return process_refuted(args, eng_mod, problem)
+
+# ---------- multi-process portfolio (--jobs N) ----------
+def _portfolio_worker(job: int, jobs: int, args, out_q, stop_event, refuted_spec=None):
+    """
+    Worker process: runs seeds run_idx = job, job+jobs, job+2*jobs, ... (the same seed
+    schedule as the sequential loop, interleaved; without --rng-seed run k > 0 uses seed k).
+    Heuristic piece-first workers also open with a different piece. Everything is reported to the parent through out_q:
+      ("progress", job, payload) | ("solved", job, run_idx, seed_label, pids)
+      ("final", job, events)     | ("exhausted", job)  | ("done", job)
+      ("refuted", job, records)  -- new proven dead states (--nogood-db)
+    refuted_spec: optional (mb, name) of the parent's SharedTranspositionTable of proven
+    dead states; every engine of every worker then probes and stores into that one table
+    (else one table per worker). Module-level so the spawn start method can import it as
+    solver._portfolio_worker.
+    """
+    refuted = None
+    nogood_log = None
+    try:
+        pieces, valid_set, eng_mod, SolverEngine, problem = _load_problem(args)
+        refuted = _worker_refuted(args, eng_mod, problem, refuted_spec)
+        if args.nogood_path:
+            nogood_log = NogoodLog(lambda records: out_q.put(("refuted", job, records)))
+        emit_progress = make_emit_progress(deque(), sink=lambda payload: out_q.put(("progress", job, payload)))
+        run_idx = job
+        while not stop_event.is_set():
+            run_seed = (args.rng_seed + run_idx) if args.rng_seed is not None else (run_idx or None)
+            seed_label = ("default" if run_seed is None else run_seed)
+            status, engine, solved = solve_seed(
+                args, SolverEngine, pieces, valid_set, problem, run_idx, run_seed, emit_progress,
+                on_solved=lambda eng: out_q.put(("solved", job, run_idx, seed_label, list(eng.placements))),
+                stop_event=stop_event, opener_offset=job, refuted=refuted, nogood_log=nogood_log)
+            label = "solved" if solved else ("stopped" if status == "stopped" else "stalled")
+            out_q.put(("final", job, final_events(args, engine, run_idx, seed_label, label)))
+            if args.engine == "dlx" and status == "exhausted_root":
+                out_q.put(("exhausted", job))
+                break
+            run_idx += jobs
+    except KeyboardInterrupt:
+        pass   # Ctrl+C reaches the whole process group; the parent handles shutdown
+    finally:
+        if nogood_log is not None:
+            nogood_log.flush()
+        if refuted is not None:
+            refuted.close()
+        out_q.put(("done", job))
+
+def run_portfolio(args, jobs: int, replay_engine, on_solution, emit_progress, refuted=None,
+                  on_refuted=None) -> int:
+    """
+    Parent side of --jobs: spawn workers, aggregate best_depth into one progress stream,
+    dedup solutions centrally (on_solution(engine) -> True if new) and stop every worker
+    once --max-results distinct solutions exist. Workers' proven dead states go to
+    on_refuted(records). Returns the number of results written.
+    """
+    # The worker must be importable by name in the child (spawn re-imports, no fork state)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    worker = importlib.import_module("solver")._portfolio_worker
+
+    ctx = multiprocessing.get_context("spawn")
+    out_q = ctx.Queue()
+    stop_event = ctx.Event()
+    refuted_spec = (refuted.mb, refuted.name) if refuted is not None else None
+    procs = [ctx.Process(target=worker, args=(j, jobs, args, out_q, stop_event, refuted_spec), daemon=True)
+             for j in range(jobs)]
+    for pr in procs:
+        pr.start()
+    print(f"[jobs] {jobs} worker processes", flush=True)
+
+    max_results = max(1, int(args.max_results))
+    results_found = 0
+    best_by_job: Dict[int, int] = {}
+    running = jobs
+    try:
+        while running:
+            try:
+                msg = out_q.get(timeout=1.0)
+            except queue_mod.Empty:
+                if not any(pr.is_alive() for pr in procs):
+                    break
+                continue
+            kind, job = msg[0], msg[1]
+            if kind == "progress":
+                payload = dict(msg[2])
+                best_by_job[job] = max(best_by_job.get(job, 0), payload.get("best_depth", 0))
+                payload["job"] = job
+                payload["best_depth"] = max(best_by_job.values())
+                emit_progress.to_streams(payload)
+            elif kind == "solved":
+                _, _, run_idx, seed_label, pids = msg
+                engine = replay_engine(pids)
+                if results_found < max_results and on_solution(engine):
+                    results_found += 1
+                    print(f"[jobs] solution {results_found}/{max_results} from job {job} "
+                          f"(run {run_idx} seed={seed_label})", flush=True)
+                    if results_found >= max_results:
+                        stop_event.set()
+            elif kind == "final":
+                events = [dict(ev, job=job) for ev in msg[2]]
+                write_final_events(emit_progress, events)
+            elif kind == "refuted":
+                if on_refuted is not None:
+                    on_refuted(msg[2])
+            elif kind == "exhausted":
+                # complete search finished in one worker: no further solutions anywhere
+                print(f"[dlx] search space exhausted after {results_found} solution(s)", flush=True)
+                stop_event.set()
+            elif kind == "done":
+                running -= 1
+    except KeyboardInterrupt:
+        print("[jobs] interrupted; stopping workers", flush=True)
+    finally:
+        stop_event.set()
+        for pr in procs:
+            pr.join(timeout=5.0)
+        for pr in procs:
+            if pr.is_alive():
+                pr.terminate()
+    return results_found
+
+# ---------- tree-split parallel DFS (--split-depth D) ----------
+def _split_engine(args, SolverEngine, pieces, valid_set, problem, refuted=None, tt_mb=None, refuted_log=None):
+    return build_engine(
+        SolverEngine, pieces, valid_set,
+        rng_seed=args.rng_seed,
+        shuffle=args.shuffle_pieces,
+        hole4=args.hole4,
+        tt_mb=args.tt_mb if tt_mb is None else tt_mb,
+        lattice_bits=args.lattice_bits,
+        batch_eval=args.batch_eval,
+        branching=args.branching,
+        stats_level=args.stats_level,
+        problem=problem,
+        refuted=refuted,
+        refuted_log=refuted_log,
+        decompose=args.decompose,
+        colour_check=args.colour_check,
+        forward_check=args.forward_check
+    )
+
+def _split_worker(wid: int, args, task_q, out_q, steal_req, stop_event, refuted_spec=None):
+    """
+    Worker process for --split-depth: take (unit_id, prefix) work units, search the
+    subtree below each prefix to exhaustion in batches of STEAL_POLL steps, and between
+    batches hand the untried tail of the shallowest frontier to idle workers (steal_req > 0).
+    Reports to out_q:
+      ("stolen", wid, parent_unit, [prefix, ...])  -- always before that unit's "unit"
+      ("solved", wid, unit_id, pids)
+      ("unit", wid, unit_id, attempts, nodes, solutions)
+      ("refuted", wid, records)   -- new proven dead states (--nogood-db)
+      ("done", wid)
+    """
+    STEAL_POLL = 512
+    refuted = None
+    nogood_log = None
+    try:
+        pieces, valid_set, eng_mod, SolverEngine, problem = _load_problem(args)
+        # the parent's shared table, else one table kept across this worker's units
+        refuted = _worker_refuted(args, eng_mod, problem, refuted_spec)
+        if args.nogood_path:
+            nogood_log = NogoodLog(lambda records: out_q.put(("refuted", wid, records)))
+        asked = False
+        while not stop_event.is_set():
+            try:
+                task = task_q.get(timeout=0.2)
+            except queue_mod.Empty:
+                if not asked:
+                    # idle: ask a busy worker to split off part of its tree
+                    with steal_req.get_lock():
+                        steal_req.value += 1
+                    asked = True
+                continue
+            if task is None:
+                break
+            asked = False
+            unit_id, prefix = task
+            # no heuristic TT: a TT cut skips unsearched siblings; only proven dead states prune
+            engine = _split_engine(args, SolverEngine, pieces, valid_set, problem, refuted, tt_mb=0,
+                                   refuted_log=nogood_log.pending if nogood_log is not None else None)
+            engine.seed_prefix(prefix)
+            solutions = 0
+            while not stop_event.is_set():
+                batch = engine.run(max_steps=STEAL_POLL, stop_on_best=False)
+                if batch.solved:
+                    solutions += 1
+                    out_q.put(("solved", wid, unit_id, list(engine.placements)))
+                    if engine.placed_count() <= engine.root_depth:
+                        break   # the prefix itself was a full placement
+                    engine.resume_after_solution()
+                    continue
+                if batch.exhausted:
+                    break
+                if nogood_log is not None:
+                    nogood_log.tick()
+                if steal_req.value > 0:
+                    granted = False
+                    with steal_req.get_lock():
+                        if steal_req.value > 0:
+                            steal_req.value -= 1
+                            granted = True
+                    if granted:
+                        stolen = engine.steal_shallowest()
+                        if stolen:
+                            out_q.put(("stolen", wid, unit_id, stolen))
+                        else:
+                            with steal_req.get_lock():
+                                steal_req.value += 1   # nothing to give: leave the request open
+            nodes = sum(engine.try_counts) - len(prefix)
+            if nogood_log is not None:
+                nogood_log.flush()
+            out_q.put(("unit", wid, unit_id, engine.attempts, nodes, solutions))
+    except KeyboardInterrupt:
+        pass   # Ctrl+C reaches the whole process group; the parent handles shutdown
+    finally:
+        if nogood_log is not None:
+            nogood_log.flush()
+        if refuted is not None:
+            refuted.close()
+        out_q.put(("done", wid))
+
+def run_split(args, jobs: int, split_depth: int, root_engine, replay_engine, on_solution, emit_progress,
+              refuted=None, on_refuted=None) -> Dict:
+    """
+    Parent side of --split-depth: expand root_engine to split_depth, queue every open
+    prefix as a work unit, hand stolen tails out as new units, and stop when all units
+    are exhausted (or --max-results distinct solutions exist). Coverage counts root
+    frontier choices whose whole subtree (including stolen parts) is finished. Workers'
+    proven dead states go to on_refuted(records).
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    worker = importlib.import_module("solver")._split_worker
+
+    prefixes = root_engine.split_prefixes(split_depth)
+    ctx = multiprocessing.get_context("spawn")
+    task_q = ctx.Queue()
+    out_q = ctx.Queue()
+    steal_req = ctx.Value("i", 0)
+    stop_event = ctx.Event()
+
+    unit_root: Dict[int, int] = {}             # unit id -> root frontier choice (first pid)
+    open_by_root: Dict[int, int] = {}          # root choice -> units not yet finished
+    roots = []
+    next_id = 0
+
+    def add_unit(prefix) -> None:
+        nonlocal next_id
+        root = prefix[0] if prefix else -1
+        if root not in open_by_root:
+            open_by_root[root] = 0
+            roots.append(root)
+        open_by_root[root] += 1
+        unit_root[next_id] = root
+        task_q.put((next_id, prefix))
+        next_id += 1
+
+    for prefix in prefixes:
+        add_unit(prefix)
+    n_initial = next_id
+    print(f"[split] depth {split_depth}: {n_initial} work units over {len(roots)} root choices, {jobs} workers", flush=True)
+
+    refuted_spec = (refuted.mb, refuted.name) if refuted is not None else None
+    procs = [ctx.Process(target=worker, args=(w, args, task_q, out_q, steal_req, stop_event, refuted_spec), daemon=True)
+             for w in range(jobs)]
+    for pr in procs:
+        pr.start()
+
+    max_results = max(1, int(args.max_results))
+    results_found = 0
+    units_done = 0
+    n_stolen = 0
+    attempts = 0
+    nodes = sum(root_engine.try_counts)        # placements made while expanding to split_depth
+    solutions = 0
+    running = jobs
+    t0 = time.time()
+    last_log = t0
+
+    def report(status_label=None) -> Dict:
+        roots_done = sum(1 for rt in roots if open_by_root[rt] == 0)
+        payload = {
+            "event": "split",
+            "split_depth": split_depth,
+            "units_initial": n_initial,
+            "units_stolen": n_stolen,
+            "units_done": units_done,
+            "root_choices": len(roots),
+            "root_choices_done": roots_done,
+            "root_coverage": round(roots_done / len(roots), 4) if roots else 1.0,
+            "attempts": attempts,
+            "nodes": nodes,
+            "solutions": solutions,
+            "elapsed_sec": round(time.time() - t0, 1),
+        }
+        if status_label:
+            payload["status"] = status_label
+        emit_progress.to_streams(payload)
+        print(f"[split] units {units_done}/{next_id} | root coverage {roots_done}/{len(roots)} | "
+              f"nodes {nodes} | solutions {solutions}" + (f" | {status_label}" if status_label else ""), flush=True)
+        return payload
+
+    try:
+        if not prefixes:
+            stop_event.set()
+        while running:
+            try:
+                msg = out_q.get(timeout=1.0)
+            except queue_mod.Empty:
+                if not any(pr.is_alive() for pr in procs):
+                    break
+                msg = None
+            if msg is not None:
+                kind, wid = msg[0], msg[1]
+                if kind == "stolen":
+                    for prefix in msg[3]:
+                        add_unit(prefix)
+                        n_stolen += 1
+                elif kind == "solved":
+                    solutions += 1
+                    engine = replay_engine(msg[3])
+                    if results_found < max_results and on_solution(engine):
+                        results_found += 1
+                        if results_found >= max_results:
+                            stop_event.set()
+                elif kind == "refuted":
+                    if on_refuted is not None:
+                        on_refuted(msg[2])
+                elif kind == "unit":
+                    _, _, unit_id, a, n, _sol = msg
+                    attempts += a
+                    nodes += n
+                    units_done += 1
+                    open_by_root[unit_root[unit_id]] -= 1
+                    if units_done == next_id:
+                        # every unit (initial + stolen) is exhausted
+                        for _ in procs:
+                            task_q.put(None)
+                elif kind == "done":
+                    running -= 1
+            if time.time() - last_log >= 5.0:
+                last_log = time.time()
+                report()
+    except KeyboardInterrupt:
+        print("[split] interrupted; stopping workers", flush=True)
+    finally:
+        stop_event.set()
+        for pr in procs:
+            pr.join(timeout=5.0)
+        for pr in procs:
+            if pr.is_alive():
+                pr.terminate()
+    exhausted = (units_done == next_id)
+    return report("exhausted" if exhausted else "stopped")
+
+# ---------- search-tree size estimate (--estimate N) ----------
+def _estimate_worker(args, worker: int, n_probes: int) -> List[List[int]]:
+    """Branching factors of n_probes random root-to-leaf walks (module-level for spawn)."""
+    try:
+        pieces, valid_set, eng_mod, SolverEngine, problem = _load_problem(args)
+        # probes never consult the TT
+        engine = _split_engine(args, SolverEngine, pieces, valid_set, problem, tt_mb=0)
+        if args.symmetry_break:
+            engine.enable_symmetry_breaking()
+        rng = random.Random(((args.rng_seed or 0) << 16) ^ worker)
+        return [engine.knuth_probe(rng) for _ in range(n_probes)]
+    except KeyboardInterrupt:
+        return []
+
+def knuth_summary(probes: List[List[int]], n_depths: int, z: float = 1.96) -> dict:
+    """
+    Knuth's estimator over probes: per-depth node counts (prod of the branching factors
+    above), their total, and the fraction of probes reaching each depth; mean and
+    normal-approximation half-width (z) over probes.
+    """
+    n = len(probes)
+    per_probe = []
+    for factors in probes:
+        est = [0.0] * (n_depths + 1)
+        prod = 1.0
+        est[0] = 1.0
+        for d, b in enumerate(factors):
+            prod *= b
+            est[d + 1] = prod
+        per_probe.append(est)
+
+    def mean_ci(values):
+        m = sum(values) / n
+        if n < 2:
+            return m, float("inf")
+        var = sum((v - m) ** 2 for v in values) / (n - 1)
+        return m, z * math.sqrt(var / n)
+
+    depths = []
+    for d in range(n_depths + 1):
+        m, ci = mean_ci([est[d] for est in per_probe])
+        reach = sum(1 for factors in probes if len(factors) >= d and all(factors[:d])) / n
+        depths.append({"depth": d, "nodes": m, "ci": ci, "reach": reach})
+    total, total_ci = mean_ci([sum(est) for est in per_probe])
+    return {"probes": n, "depths": depths, "total_nodes": total, "total_ci": total_ci}
+
+def measure_node_rate(engine, seconds: float) -> Tuple[float, float]:
+    """(placements/s, attempts/s) of the real search (TT on) over `seconds`."""
+    t0 = time.monotonic()
+    deadline = t0 + seconds
+    while time.monotonic() < deadline:
+        batch = engine.run(deadline=deadline, stop_on_best=False)
+        if batch.solved:
+            engine.resume_after_solution()
+        elif batch.exhausted:
+            break
+    dt = max(1e-6, time.monotonic() - t0)
+    return sum(engine.try_counts) / dt, engine.attempts / dt
+
+def run_estimate(args, jobs: int, SolverEngine, pieces, valid_set, problem) -> dict:
+    """
+    --estimate: random probes (split over `jobs` processes), Knuth summary, measured
+    node rate and the implied hours to exhaust. Prints a table and writes
+    results/<Name>.estimate.json.
+    """
+    n_probes = max(1, int(args.estimate))
+    shares = [n_probes // jobs + (1 if w < n_probes % jobs else 0) for w in range(jobs)]
+    t0 = time.monotonic()
+    if jobs > 1:
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        worker = importlib.import_module("solver")._estimate_worker
+        with multiprocessing.get_context("spawn").Pool(jobs) as pool:
+            parts = pool.starmap(worker, [(args, w, k) for w, k in enumerate(shares) if k])
+    else:
+        parts = [_estimate_worker(args, 0, n_probes)]
+    probes = [f for part in parts for f in part]
+    probe_secs = time.monotonic() - t0
+    if not probes:
+        return {}
+
+    engine = _split_engine(args, SolverEngine, pieces, valid_set, problem)
+    if args.symmetry_break:
+        engine.enable_symmetry_breaking()
+    nodes_per_sec, attempts_per_sec = measure_node_rate(engine, args.estimate_rate_seconds)
+
+    summary = knuth_summary(probes, engine.total_pieces())
+    hours = summary["total_nodes"] / max(nodes_per_sec, 1e-9) / 3600.0
+    hours_ci = summary["total_ci"] / max(nodes_per_sec, 1e-9) / 3600.0
+    summary.update({
+        "container": args.container_name,
+        "branching": args.branching,
+        "probe_seconds": probe_secs,
+        "nodes_per_sec": nodes_per_sec,
+        "attempts_per_sec": attempts_per_sec,
+        "hours_to_exhaust": hours,
+        "hours_ci": hours_ci,
+        "jobs": jobs,
+    })
+
+    print(f"[estimate] {len(probes)} probes in {probe_secs:.1f}s ({jobs} process(es)); 95% intervals", flush=True)
+    print(f"[estimate] {'depth':>5} {'nodes':>12} {'+/-':>12} {'reach':>7}")
+    for row in summary["depths"]:
+        if row["nodes"] > 0:
+            print(f"[estimate] {row['depth']:>5} {row['nodes']:>12.4g} {row['ci']:>12.4g} {row['reach']:>7.1%}")
+    print(f"[estimate] total {summary['total_nodes']:.4g} +/- {summary['total_ci']:.4g} nodes")
+    print(f"[estimate] rate {nodes_per_sec:.0f} nodes/s ({attempts_per_sec:.0f} attempts/s, one process, TT on)")
+    line = f"[estimate] time to exhaust ~ {hours:.4g} +/- {hours_ci:.4g} h in one process"
+    if jobs > 1:
+        line += f" (~ {hours / jobs:.4g} h with --jobs {jobs} --split-depth)"
+    print(line, flush=True)
+
+    _atomic_write(os.path.join(RESULTS_DIR, f"{args.container_name}.estimate.json"),
+                  json.dumps(summary, ensure_ascii=False, indent=2))
+    return summary
+
 # ---------- CLI ----------
 def build_argparser():
     p = argparse.ArgumentParser(
@@ -568,10 +1557,20 @@ def build_argparser():
             "  python solver.py containers/firstbox.py.json --hole4\n"
             "  python solver.py containers/firstbox.py.json --rng-seed 42\n"
             "  python solver.py containers/firstbox.py.json --restart-on-stall 900\n"
+            "  python solver.py containers/firstbox.py.json --branching cell-first --hole4 --max-results 100 --nogood-db\n"
             "  python solver.py containers/firstbox.py.json --rng-seed 42 --max-results 3\n"
+            "  python solver.py containers/firstbox.py.json --jobs 8 --max-results 4\n"
+            "  python solver.py containers/firstbox.py.json --jobs 8 --split-depth 2 --branching cell-first --hole4\n"
             "  python solver.py containers/firstbox.py.json --rng-seed 42 --shuffle-pieces within-buckets\n"
             "  python solver.py containers/firstbox.py.json --stall-below-23 300 --stall-at-23 900 --stall-at-24 1800\n"
             "  python solver.py containers/firstbox.py.json --snapshot-interval 5 --snapshot-on-depth\n"
+            "  python solver.py containers/firstbox.py.json --checkpoint-interval 300\n"
+            "  python solver.py containers/firstbox.py.json --estimate 2000 --jobs 8 --hole4\n"
+            "  python solver.py --resume results/firstbox.py.checkpoint.bin --checkpoint-interval 300\n"
+            "  python solver.py containers/firstbox.py.json --engine dlx\n"
+            "  python solver.py containers/firstbox.py.json --branching cell-first --hole4\n"
+            "  python solver.py containers/firstbox.py.json --branching cell-first --hole4 --decompose\n"
+            "  python solver.py containers/firstbox.py.json --engine dlx --symmetry-break --rng-seed 1 --max-results 5\n"
         ),
         formatter_class=argparse.RawTextHelpFormatter
     )
@@ -603,9 +1602,74 @@ def build_argparser():
     p.add_argument("--check-thickness", action="store_true",
         help="Debug: print counts of cells that have all 6 axial neighbors vs all 6 diagonal neighbors.")
 
+    p.add_argument("--jobs", type=int, default=1, metavar="N",
+        help="Run a portfolio of N worker processes (interleaved seeds, staggered openers). The parent\n"
+             "aggregates progress, dedups solutions and stops all workers at --max-results. Default: 1.\n"
+             "Rolling snapshots (--snapshot-*) are disabled in portfolio mode.")
+
+    p.add_argument("--split-depth", type=int, default=None, metavar="D",
+        help="Exhaustive tree-split mode: expand the search to depth D, run every open prefix as a work unit\n"
+             "on --jobs worker processes (idle workers steal untried tails from busy ones); reports node counts\n"
+             "and root-frontier coverage. Needs --branching cell-first; units run without the heuristic TT\n"
+             "(only proven dead states prune). No stall windows or opener rotation.")
+
     p.add_argument("--try-openers", type=int, default=6, metavar="N",
         help="If a run exhausts at depth 0, rotate the opening piece up to N times before changing seed (default: 6).")
 
+    p.add_argument("--engine", choices=["heuristic","dlx"], default="heuristic",
+        help="Search backend: 'heuristic' (SolverEngine, default) or 'dlx' (exact cover, Dancing Links + MRV).")
+
+    p.add_argument("--branching", choices=["piece-first","cell-first"], default="piece-first",
+        help="piece-first: piece per depth fixed by the opener order (default).\n"
+             "cell-first: branch on the empty cell with the fewest live placements over all remaining pieces\n"
+             "            (dynamic piece order; --try-openers is not needed).")
+
+    p.add_argument("--decompose", action="store_true",
+        help="cell-first: when placements split the empty space, fill the smallest component completely before\n"
+             "touching another and remember components that cannot be filled with the pieces left.")
+
+    p.add_argument("--colour-check", action="store_true",
+        help="Prune placements after which the empty cells' counts per FCC sublattice colour class cannot be\n"
+             "covered exactly by the remaining pieces (a cheap global parity test; exact-cover containers only).")
+
+    p.add_argument("--forward-check", action="store_true",
+        help="Keep live-placement counts per empty cell and per remaining piece across moves: a node dies when\n"
+             "either reaches 0 and the placement is forced when either reaches 1 (fewer nodes, slower steps).")
+
+    p.add_argument("--tt-mb", type=float, default=None, metavar="MB",
+        help="Transposition table memory budget in MiB (fixed size, no eviction pauses; 0 = no TT).\n"
+             "Default: engine default (64).\n"
+             "The TT is heuristic and private to each engine; states proven dead (complete cell-first subtrees\n"
+             "without a solution) go to a separate table kept across seeds and opener rotations.")
+
+    p.add_argument("--shared-tt", action="store_true",
+        help="With --jobs / --split-depth: keep the table of proven dead states in shared memory for all workers,\n"
+             "so a region refuted by one process prunes the others (each engine keeps its own TT).")
+
+    p.add_argument("--nogood-db", action="store_true",
+        help="Persist proven dead states (see --tt-mb) across launches in\n"
+             "results/<container CID>.<layout hash>.nogood.bin:\n"
+             "loaded at start, appended to (8 bytes each) every few seconds while the search runs.\n"
+             "Heuristic engine only; only exact-cover cell-first or --forward-check searches prove states dead.")
+    p.add_argument("--nogood-mb", type=float, default=None, metavar="MB",
+        help="Size cap of the nogood file in MiB; appends stop there (default: 16).")
+
+    p.add_argument("--lattice-bits", action="store_true",
+        help="Evaluate isolation/exposure/leaf/hole checks on a padded (i,j,k) bitboard (same results, fewer Python loops).")
+
+    p.add_argument("--batch-eval", action="store_true",
+        help="Evaluate the whole-piece fallback and large MRV-cell candidate sets in one NumPy batch\n"
+             "(identical choices; requires numpy).")
+
+    p.add_argument("--symmetry-break", action="store_true",
+        help="Compute the container's lattice automorphisms; branch on one opening placement per symmetry orbit\n"
+             "(cell-first and DLX open at the piece or cell with the fewest orbits) and treat symmetric\n"
+             "solutions as duplicates.")
+
+    p.add_argument("--stats-level", choices=["off","counters","full"], default="off",
+        help="Search instrumentation: off (default, no hot-path bookkeeping), counters (considered/pruned),\n"
+             "full (counters + heuristic histograms). Non-off levels append a 'stats' event to progress.jsonl per run.")
+
     # Hole pruning (escape % as %% to avoid argparse formatting error)
     p.add_argument("--hole4", "--hole-mod4", action="store_true", dest="hole4",
         help="Enable hole-detect pruning. Reject states where an empty region size %% 4 != 0.")
@@ -620,6 +1684,25 @@ def build_argparser():
     p.add_argument("--snapshot-on-depth", action="store_true",
         help="Also write a snapshot whenever best depth improves.")
 
+    # Tree-size estimate
+    p.add_argument("--estimate", type=int, default=None, metavar="PROBES",
+        help="Do not solve: estimate the search tree (Knuth's estimator over PROBES random root-to-leaf walks\n"
+             "through the same choice builder, caps and pruning; TT ignored, so an upper bound) and report nodes\n"
+             "per depth, total size with 95%% intervals and hours to exhaust at the measured node rate.\n"
+             "Probes run on --jobs processes. Heuristic engine only.")
+
+    p.add_argument("--estimate-rate-seconds", type=float, default=10.0, metavar="SECONDS",
+        help="How long --estimate runs the real search to measure nodes/s (default: 10).")
+
+    # Checkpoints
+    p.add_argument("--checkpoint-interval", type=int, default=None, metavar="SECONDS",
+        help="Every N seconds (and between runs) save the full search state to results/<Name>.checkpoint.bin\n"
+             "(placements, frontiers, try counts, counters, transposition table). Sequential heuristic search only.")
+
+    p.add_argument("--resume", default=None, metavar="PATH",
+        help="Continue exactly where a checkpoint stopped. Search options (container, seed, engine settings,\n"
+             "stall windows, ...) come from the checkpoint; combine with --checkpoint-interval to keep saving.")
+
     return p
 
 # ---------- driver ----------
@@ -630,6 +1713,19 @@ def main():
     p = build_argparser()
     args = p.parse_args()
 
+    # resume: the checkpoint fixes the search options
+    resume = None
+    if args.resume:
+        try:
+            resume_layout, resume = read_checkpoint(args.resume)
+        except (OSError, ValueError) as e:
+            p.error(f"--resume {args.resume}: {e}")
+        for k, v in resume["args"].items():
+            setattr(args, k, v)
+    if (args.checkpoint_interval is not None or resume is not None) and (
+            args.engine == "dlx" or args.jobs > 1 or args.split_depth is not None):
+        p.error("--checkpoint-interval / --resume need the sequential heuristic search (no --engine dlx, --jobs, --split-depth)")
+
     # container
     container_path = args.container
     container = load_json(container_path)
@@ -656,15 +1752,17 @@ def main():
         print(f"[thickness] cells with all 6 axial neighbors: {axial_full}")
         print(f"[thickness] cells with all 6 diagonal (FCC) neighbors: {diag_full}")
 
-    # pieces + engine class
-    pieces_mod = load_py_module(PIECES_PATH, "pieces_module")
-    pieces = extract_pieces(pieces_mod)
-    eng_mod = load_py_module(ENGINE_PATH, "engine_module")
-    SolverEngine = getattr(eng_mod, "SolverEngine")
+    # pieces + engine class + shared problem tables
+    pieces, valid_set, eng_mod, SolverEngine, problem = _load_problem(args)
+    if args.batch_eval and getattr(eng_mod, "np", None) is None:
+        print("[warn] --batch-eval needs numpy; falling back to per-candidate evaluation", flush=True)
 
     # progress emitter
     tail = deque(maxlen=256)
     emit_progress = make_emit_progress(tail)
+    # the UI stops the solver with SIGTERM: unwind through the finally blocks and atexit hooks
+    # so the progress writer drains and the nogood journal flushes its last records
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
 
     # seeds / loop
     base_seed = args.rng_seed
@@ -672,7 +1770,6 @@ def main():
     max_results = max(1, int(args.max_results))
     results_found = 0
     seen_sigs = set()
-    best_depth_ever = 0
 
     # output paths
     def base_paths():
@@ -685,112 +1782,173 @@ def main():
         world_layers_path = os.path.join(RESULTS_DIR, f"{container_name}.result{k}.world_layers.txt")
         return world_json_path, world_layers_path
 
-    # stall logic
-    def effective_stall_limit(best_depth: int):
-        if args.stall_at_24 is not None and best_depth >= 24:
-            return args.stall_at_24
-        if args.stall_at_23 is not None and best_depth >= 23:
-            return args.stall_at_23
-        if args.stall_below_23 is not None and best_depth < 23:
-            return args.stall_below_23
-        return args.restart_on_stall
-
-    # solution signature to dedup identical solutions
+    # solution signature to dedup identical (and, with --symmetry-break, symmetric) solutions
     def solution_signature(engine) -> Tuple:
-        bag = []
-        for pl in engine.placements:
-            bag.append((pl["piece"], tuple(sorted(pl["cells_idx"]))))
-        bag.sort()
-        return tuple(bag)
+        return engine.solution_signature()
 
-    # main multi-run loop
-    while results_found < max_results:
-        run_seed = (base_seed + run_idx) if base_seed is not None else None
-        seed_label = ("default" if run_seed is None else run_seed)
+    # dedup + write; True if the solution was new
+    def record_solution(engine) -> bool:
+        sig = solution_signature(engine)
+        if sig in seen_sigs:
+            return False
+        seen_sigs.add(sig)
+        if max_results == 1:
+            wjson, wlayers = base_paths()
+        else:
+            wjson, wlayers = indexed_paths(len(seen_sigs))
+        write_world_json(engine, wjson, container_path, container_name, r)
 
-        tried = 0
-        max_try_openers = max(0, int(args.try_openers))
-        rotated_solved = False
-
-        while tried <= max_try_openers:
-            # fresh engine for this attempt
-            engine = build_engine(
-                SolverEngine,
-                pieces,
-                valid_set,
-                rng_seed=run_seed,
-                shuffle=args.shuffle_pieces,
-                rotate_first=tried,
-                hole4=args.hole4
-            )
+        # Load hashes + timestamp from the just-written JSON so the TXT header matches
+        _meta = {}
+        try:
+            with open(wjson, "r", encoding="utf-8") as _f:
+                _meta = json.load(_f)
+        except Exception:
+            _meta = {}
 
-            status, progressed_any = run_once_with_engine(
-                engine, run_idx, seed_label, effective_stall_limit, emit_progress, args
-            )
+        write_world_layers(engine, wlayers, meta=_meta)
+        return True
 
-            best_depth = getattr(engine, "best_depth_ever", engine.placed_count())
-            if best_depth > best_depth_ever:
-                best_depth_ever = best_depth
-
-            if status == "solved" and engine.placed_count() == engine.total_pieces():
-                sig = solution_signature(engine)
-                if sig not in seen_sigs:
-                    seen_sigs.add(sig)
-                    if max_results == 1:
-                        wjson, wlayers = base_paths()
-                    else:
-                        wjson, wlayers = indexed_paths(results_found + 1)
-                    write_world_json(engine, wjson, container_path, container_name, r)
-
-                    # Load hashes + timestamp from the just-written JSON so the TXT header matches
-                    _meta = {}
-                    try:
-                        with open(wjson, "r", encoding="utf-8") as _f:
-                            _meta = json.load(_f)
-                    except Exception:
-                        _meta = {}
-
-                    write_world_layers(engine, wlayers, meta=_meta)
-                    results_found += 1
-                rotated_solved = True
-                break
+    if args.symmetry_break:
+        print(f"[symmetry] container automorphisms: {len(problem.symmetry()[0])}", flush=True)
 
-            if status == "exhausted_root":
-                tried += 1
-                if tried <= max_try_openers:
-                    continue
-                else:
-                    break
-            else:
-                # stalled mid-depth or exhausted after some depth
-                break
+    if args.decompose and (args.engine == "dlx" or args.branching != "cell-first"):
+        p.error("--decompose needs --branching cell-first (piece-first fixes the piece per depth)")
 
-        # write a final progress event for this run
-        def _write_final(status_label):
-            payload = {
-                "event":"progress",
-                "run": run_idx,
-                "seed": seed_label,
-                "status": status_label,
-                "placed": engine.placed_count(),
-                "best_depth": getattr(engine, "best_depth_ever", engine.placed_count()),
-                "total": engine.total_pieces(),
-                "attempts": getattr(engine, "attempts", 0),
-                "attempts_per_sec": 0,
-            }
-            with open(PROGRESS_STREAM, "a", encoding="utf-8") as f:
-                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-            with open(PROGRESS_PATH, "w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+    if args.forward_check and args.engine == "dlx":
+        p.error("--forward-check needs the heuristic engine (dlx already branches on the tightest column)")
 
-        if rotated_solved:
-            _write_final("solved")
+    if args.colour_check:
+        if args.engine == "dlx":
+            p.error("--colour-check needs the heuristic engine")
+        tab = problem.colour_table()
+        if tab is None:
+            print("[colour] pieces do not exactly cover the container; colour check off", flush=True)
         else:
-            _write_final("stalled")
+            print(f"[colour] {eng_mod.N_COLOURS} classes, {len(tab['types'])} piece colour types", flush=True)
+
+    if args.estimate is not None:
+        if args.engine == "dlx":
+            p.error("--estimate needs the heuristic engine (it probes SolverEngine choice lists)")
+        run_estimate(args, max(1, int(args.jobs)), SolverEngine, pieces, valid_set, problem)
+        return
+
+    # proven dead states from earlier launches (workers read the same file themselves);
+    # only this process appends to it
+    args.nogood_path = nogood_path(problem) if args.nogood_db and args.engine != "dlx" else None
+    nogood_sink = None
+    if args.nogood_path:
+        nogood_sink = nogood_writer(args, problem, load_nogood(args, problem, announce=True))
+
+    # parallel modes: workers search, this process aggregates and writes
+    jobs = max(1, int(args.jobs))
+
+    def replay_engine(pids):
+        eng = build_engine(eng_mod.SolverEngine, pieces, valid_set, tt_mb=0,
+                           symmetry=args.symmetry_break, problem=problem)
+        eng.replay(pids)
+        return eng
+
+    # proven dead states in shared memory for every worker process (owned, and unlinked, by this process)
+    shared_refuted = None
+    if args.shared_tt and (jobs > 1 or args.split_depth is not None) and args.engine != "dlx":
+        shared_refuted = eng_mod.SharedTranspositionTable(eng_mod.DEFAULT_REFUTED_MB)
+        if args.nogood_path:
+            load_nogood(args, problem, shared_refuted)
+        print(f"[tt] shared refuted-state table: {shared_refuted.nbytes() / (1 << 20):.0f} MiB", flush=True)
+    try:
+        if args.split_depth is not None:
+            if args.engine == "dlx":
+                p.error("--split-depth needs the heuristic engine (it splits SolverEngine frontiers)")
+            if args.split_depth < 1:
+                p.error("--split-depth must be >= 1")
+            if args.branching != "cell-first":
+                p.error("--split-depth needs --branching cell-first (piece-first caps and anchor choices "
+                        "leave subtrees unsearched)")
+            if not problem.exact_cover:
+                print("[split] pieces do not exactly cover the container; units are not searched exhaustively", flush=True)
+            root_engine = _split_engine(args, SolverEngine, pieces, valid_set, problem, tt_mb=0)
+            if args.symmetry_break:
+                root_engine.enable_symmetry_breaking()
+            run_split(args, jobs, args.split_depth, root_engine, replay_engine, record_solution, emit_progress,
+                      refuted=shared_refuted, on_refuted=nogood_sink)
+            return
+        if jobs > 1:
+            args.snapshot_interval = None
+            args.snapshot_on_depth = False
+            run_portfolio(args, jobs, replay_engine, record_solution, emit_progress, refuted=shared_refuted,
+                          on_refuted=nogood_sink)
+            return
+    finally:
+        if shared_refuted is not None:
+            shared_refuted.close()
+
+    # one table of proven dead states carried across every seed and opener
+    run_refuted = process_refuted(args, eng_mod, problem)
+    nogood_log = NogoodLog(nogood_sink) if nogood_sink is not None else None
+
+    # checkpoints: where the loop is and the refuted states, plus the engine state (not between runs)
+    checkpoint = None
+    if args.checkpoint_interval is not None:
+        checkpoint_path = os.path.join(RESULTS_DIR, f"{container_name}.checkpoint.bin")
+
+        def checkpoint(engine, ck_run_idx, tried, since_improve, fresh):
+            driver_state = {
+                "run_idx": ck_run_idx, "tried": tried, "since_improve": since_improve, "fresh": fresh,
+                "results_found": results_found, "seen_sigs": list(seen_sigs),
+                "refuted": run_refuted.dump() if run_refuted is not None else None,
+            }
+            engine_state = {} if fresh else engine.checkpoint_state()
+            try:
+                write_checkpoint(checkpoint_path, problem.layout_hash, args, driver_state, engine_state)
+            except OSError as e:
+                print(f"[checkpoint] write failed: {e}", flush=True)
+
+    seed_resume = None
+    if resume is not None:
+        if resume_layout != problem.layout_hash:
+            p.error(f"--resume {args.resume}: written for a different container/piece layout")
+        seed_resume = dict(resume["driver"], engine=resume["engine"])
+        run_idx = seed_resume["run_idx"]
+        results_found = seed_resume["results_found"]
+        seen_sigs.update(seed_resume["seen_sigs"])
+        if seed_resume["refuted"] is not None and run_refuted is not None:
+            run_refuted.load(seed_resume["refuted"])
+        print(f"[resume] run {run_idx}, {results_found} result(s) so far", flush=True)
 
-        run_idx += 1
-        if results_found >= max_results:
-            break
+    # main multi-run loop
+    try:
+        while results_found < max_results:
+            run_seed = (base_seed + run_idx) if base_seed is not None else None
+            seed_label = ("default" if run_seed is None else run_seed)
+
+            def on_solved(engine):
+                nonlocal results_found
+                if record_solution(engine):
+                    results_found += 1
+
+            status, engine, solved = solve_seed(
+                args, SolverEngine, pieces, valid_set, problem, run_idx, run_seed, emit_progress, on_solved,
+                refuted=run_refuted, checkpoint=checkpoint, resume=seed_resume, nogood_log=nogood_log
+            )
+            seed_resume = None
+
+            # write a final progress event for this run
+            write_final_events(emit_progress, final_events(args, engine, run_idx, seed_label,
+                                                           "solved" if solved else "stalled"))
+
+            run_idx += 1
+            if checkpoint is not None:
+                checkpoint(engine, run_idx, 0, 0.0, True)
+            if results_found >= max_results:
+                break
+            if args.engine == "dlx" and status == "exhausted_root":
+                # complete search finished: there are no (further) solutions to find
+                print(f"[dlx] search space exhausted after {results_found} solution(s)", flush=True)
+                break
+    finally:
+        if nogood_log is not None:
+            nogood_log.flush()
 
     return
 
@@ -1,18 +1,38 @@
 # core/solver_engine.py
 # FCC tetra-spheres solver engine — rev13.2 (standalone port from GH)
-# Features: bitmask + precomputed fits, local pruning, dynamic branch-cap,
+# Features: bitmask + precomputed fits in a flat placement-id table, local pruning, dynamic branch-cap,
 # forced-singletons, exposure+boundary+leaf heuristic, least-tried roulette
-# with corridor lockout, bounded TT, deg2-corridor toggle.
+# with corridor lockout, fixed-size array TT (MiB budget), deg2-corridor toggle.
+# Branching: piece-first (fixed order) or cell-first (MRV cell, dynamic piece).
+# DLXEngine: exact-cover backend (dancing links, MRV) with the same step surface.
+# Optional root symmetry breaking over the container's lattice automorphisms.
+# Optional decomposition of disconnected empty components (cell-first).
+# Optional colour-count prune (sublattice colour classes vs. the remaining pieces).
+# Optional forward checking (live-placement counters per cell and per piece, trailed).
+# Optional table of proven dead states (refuted), shareable across engines, runs and processes.
 #
 # This file intentionally does NOT depend on Rhino/GH. It operates purely on
 # integer FCC lattice coordinates (i, j, k).
 
 from __future__ import annotations
+import hashlib
 import math
 import random
 import time
-from collections import deque, defaultdict
-from typing import Dict, Tuple, List, Set, Optional
+from array import array
+from itertools import permutations, product
+from collections import defaultdict
+from typing import Dict, Tuple, List, Set, Optional, NamedTuple
+
+try:
+    import numpy as np  # optional: batched candidate evaluation
+except ImportError:
+    np = None
+
+try:
+    from multiprocessing import shared_memory  # optional: cross-process TT
+except ImportError:
+    shared_memory = None
 
 # --------------------------
 # Tunables (defaults; can be tweaked by caller after construction)
@@ -21,8 +41,8 @@ DEFAULT_BRANCH_CAP_OPEN   = 18            # open regions
 DEFAULT_BRANCH_CAP_TIGHT  = 10            # degree-1 corridors
 DEFAULT_ROULETTE_MODE     = "least-tried" # "least-tried" or "none"
 DEFAULT_RNG_SEED          = 1337
-DEFAULT_TT_MAX            = 1_200_000
-DEFAULT_TT_TRIM_KEEP      = 800_000
+DEFAULT_TT_MB             = 64            # transposition table budget (MiB)
+DEFAULT_REFUTED_MB        = 16            # proven-dead-state table kept across runs (MiB)
 
 # Heuristic weights (rev13.2)
 DEFAULT_EXPOSURE_WEIGHT          = 1.0
@@ -36,12 +56,58 @@ DEFAULT_DEG2_CORRIDOR = False  # keep degree-2 corridors OFF unless explicitly e
 DEFAULT_HOLE_MOD4_DETECT = False
 # ------------------------------------------------------------
 
+# Branching: "piece-first" (piece fixed per depth by self.order, cell chosen
+# dynamically) or "cell-first" (MRV cell, branch over every remaining piece)
+DEFAULT_BRANCHING = "piece-first"
+
+# Padded (i,j,k) bitboard evaluation of the pruning/heuristic checks
+DEFAULT_LATTICE_BITBOARD = False
+
+# NumPy-batched candidate evaluation (ignored when NumPy is not installed): the whole-piece
+# fallback, and MRV cells with at least BATCH_MIN_ROWS live placements; below that NumPy's
+# per-call overhead costs more than the per-candidate loop
+DEFAULT_BATCH_EVAL = False
+BATCH_MIN_ROWS = 5
+BATCH_FILLED   = 64         # board value of a filled cell in the batch path (> any degree)
+
+# Root symmetry breaking over the container's lattice automorphisms
+DEFAULT_SYMMETRY_BREAK = False
+
+# Cell-first: fill disconnected empty components one at a time (needs component tracking)
+DEFAULT_DECOMPOSE = False
+DECOMP_NOGOOD_CAP = 1 << 20   # failed-component cache is cleared when it reaches this size
+
+# Prune placements after which the empty cells' colour counts cannot be covered by the remaining pieces
+DEFAULT_COLOUR_CHECK = False
+
+# Forward checking: prune a node when an empty cell or a remaining piece has no live placement left,
+# force the placement when one has exactly one
+DEFAULT_FORWARD_CHECK = False
+
+# SolverEngine.run(): steps between clock reads when a deadline is given
+RUN_CLOCK_STRIDE = 64
+
+# Instrumentation tier, fixed at construction:
+#   "off"      - no per-candidate / per-anchor bookkeeping
+#   "counters" - considered / pruned / fallback counters
+#   "full"     - counters + exposure/boundary/leaf/choices/anchor histograms, anchor transitions
+STATS_LEVELS = ("off", "counters", "full")
+DEFAULT_STATS_LEVEL = "off"
+
 # FCC adjacency (12-neighbor)
 _NEIGH = (
     (1,0,0),(-1,0,0),(0,1,0),(0,-1,0),(0,0,1),(0,0,-1),
     (1,-1,0),(-1,1,0),(1,0,-1),(-1,0,1),(0,1,-1),(0,-1,1)
 )
 
+# Colour classes: the four simple-cubic sublattices of the FCC lattice, i.e. the
+# parities of u=j+k and v=i+k (the layer coordinates of write_world_layers_str).
+N_COLOURS = 4
+
+def _colour_class(cell: Tuple[int,int,int]) -> int:
+    i, j, k = cell
+    return (((j + k) & 1) << 1) | ((i + k) & 1)
+
 # Preferred piece order bias (rev13.2)
 _ORDER_PREF = (
     "A","C","E","G","I","J","H","F","D","B","Y",
@@ -51,11 +117,646 @@ _ORDER_PREF = (
 )
 
 
+def _fcc_point_group():
+    """
+    The 48 cube symmetries as (i,j,k) -> (i,j,k) maps. The FCC lattice is the
+    even-parity sublattice of Z^3 via x=j+k, y=i+k, z=i+j; signed axis
+    permutations of (x,y,z) preserve it, so each maps back to integer (i,j,k).
+    """
+    ops = []
+    for perm in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            def op(c, perm=perm, signs=signs):
+                i, j, k = c
+                p = (j + k, i + k, i + j)
+                x, y, z = (signs[0] * p[perm[0]], signs[1] * p[perm[1]], signs[2] * p[perm[2]])
+                return ((y + z - x) // 2, (x + z - y) // 2, (x + y - z) // 2)
+            ops.append(op)
+    return ops
+
+
+def _popcount_py(x: int) -> int:
+    return bin(x).count("1")
+
+_popcount = getattr(int, "bit_count", None) or _popcount_py
+
+
+class RunResult(NamedTuple):
+    """What SolverEngine.run() did in one batch."""
+    steps: int          # step_once() calls made
+    solved: bool        # the last step completed a placement
+    new_best: bool      # best_depth_ever rose during the batch
+    exhausted: bool     # the last step made no progress (subtree below root_depth is done)
+
+
+class TranspositionTable:
+    """
+    Fixed-size open-addressed TT backed by one array('Q').
+
+    Buckets hold 2 slots: slot 0 is depth-preferred, slot 1 is always-replace.
+    Each slot is a single 64-bit word: high 56 bits = verification tag (the
+    Zobrist key with its low byte cleared), low 8 bits = stored cursor + 1
+    (0 = empty). The bucket index comes from key bits 8.. so it never overlaps
+    the depth byte.
+
+    "Depth-preferred" follows the usual TT meaning: the entry that refuted the
+    larger subtree (smaller cursor = more pieces left) keeps slot 0.
+    """
+
+    SLOTS_PER_BUCKET = 2
+    _TAG_MASK = 0xFFFFFFFFFFFFFF00
+
+    def __init__(self, mb: float = DEFAULT_TT_MB):
+        self._size(mb)
+        self.slots = array("Q", [0]) * (self.n_buckets * self.SLOTS_PER_BUCKET)
+
+    def _size(self, mb: float) -> None:
+        n_buckets = 1
+        limit = max(1, int(float(mb) * (1 << 20)) // (8 * self.SLOTS_PER_BUCKET))
+        while n_buckets * 2 <= limit:
+            n_buckets *= 2
+        self.mb = mb
+        self.n_buckets = n_buckets
+        self.bucket_mask = n_buckets - 1
+
+    def nbytes(self) -> int:
+        return len(self.slots) * self.slots.itemsize
+
+    def close(self) -> None:
+        pass   # process-local memory; SharedTranspositionTable releases its block here
+
+    def dump(self) -> Tuple[int, bytes]:
+        """(n_buckets, raw slots) for a checkpoint; see load()."""
+        return self.n_buckets, self.slots.tobytes()
+
+    def load(self, dumped: Tuple[int, bytes]) -> bool:
+        """Restore dump() output into a table of the same size; False (unchanged) otherwise."""
+        n_buckets, raw = dumped
+        if n_buckets != self.n_buckets:
+            return False
+        self.slots[:] = array("Q", raw)
+        return True
+
+    def get(self, key: int) -> int:
+        """Stored cursor for key, or -1 if absent."""
+        slots = self.slots
+        b = ((key >> 8) & self.bucket_mask) << 1
+        tag = key & self._TAG_MASK
+        w = slots[b]
+        if w and (w & self._TAG_MASK) == tag:
+            return (w & 0xFF) - 1
+        w = slots[b + 1]
+        if w and (w & self._TAG_MASK) == tag:
+            return (w & 0xFF) - 1
+        return -1
+
+    def store(self, key: int, cursor: int) -> None:
+        slots = self.slots
+        b = ((key >> 8) & self.bucket_mask) << 1
+        tag = key & self._TAG_MASK
+        val = min(cursor, 254) + 1
+        word = tag | val
+
+        # same key already present -> keep the larger cursor (matches old dict semantics)
+        for s in (b, b + 1):
+            w = slots[s]
+            if w and (w & self._TAG_MASK) == tag:
+                if val > (w & 0xFF):
+                    slots[s] = word
+                return
+
+        w0 = slots[b]
+        if not w0:
+            slots[b] = word
+        elif val <= (w0 & 0xFF):
+            # new entry covers at least as much remaining work: take slot 0, demote old
+            slots[b + 1] = w0
+            slots[b] = word
+        else:
+            slots[b + 1] = word
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    The same slot layout in multiprocessing.shared_memory, so every worker process
+    probes and stores into one table. A slot is one aligned 64-bit word (tag + cursor):
+    racing writers can lose an entry but never leave a torn one, so no locks are taken.
+
+    The creating process owns the block (close() unlinks it); other processes attach
+    with SharedTranspositionTable(mb, name) using the creator's (mb, name).
+    """
+
+    def __init__(self, mb: float = DEFAULT_TT_MB, name: Optional[str] = None):
+        if shared_memory is None:
+            raise RuntimeError("multiprocessing.shared_memory is not available")
+        self._size(mb)
+        size = self.n_buckets * self.SLOTS_PER_BUCKET * 8
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)   # zero-filled
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.name = self._shm.name
+        self.slots = self._shm.buf[:size].cast("Q")
+
+    def close(self) -> None:
+        if getattr(self, "slots", None) is None:
+            return
+        self.slots.release()
+        self.slots = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PreparedProblem:
+    """
+    Everything that depends only on (pieces, container): normalized pieces, grid,
+    neighbours, boundary flags, lattice layout, Zobrist keys and the placement table.
+    Build once and pass to every engine (SolverEngine(..., problem=...)) so seeds and
+    opener rotations only allocate per-run search state. Treat as read-only.
+    """
+
+    # Attributes every engine binds directly (hot-path lookups stay plain attribute reads)
+    SHARED = (
+        "pieces", "valid_set", "idx2cell", "cell2idx", "neighbors", "is_boundary", "nbr_mask",
+        "lat_pad_bit", "lat_shifts", "lat_valid", "lat_boundary",
+        "occ_keys", "piece_keys",
+        "piece_ids", "piece_index",
+        "pl_piece", "pl_origin", "pl_ori", "pl_zkey",
+        "pl_mask", "pl_cells_t", "n_placements", "fits", "fits_flat", "cover", "exact_cover",
+    )
+
+    def __init__(self,
+                 pieces: Dict[str, Tuple[Tuple[Tuple[int,int,int], ...], ...]],
+                 valid_set: Set[Tuple[int,int,int]]):
+        self.pieces = self._normalize_pieces(pieces)
+        self.valid_set = frozenset(valid_set)
+
+        # Grid
+        (self.idx2cell,
+         self.cell2idx,
+         self.neighbors,
+         self.is_boundary) = self._build_grid(self.valid_set)
+        self._init_lattice()
+        self.nbr_mask = tuple(sum(1 << n for n in nbrs) for nbrs in self.neighbors)
+
+        # Default order (engines may reorder; placement ids keep this piece indexing)
+        self.order = self._pick_order(self.pieces)
+
+        # Zobrist keys (needed by the fit table)
+        N = len(self.idx2cell)
+        self.occ_keys, self.piece_keys = self._init_zobrist(N)
+
+        # Fits -> placement table
+        raw_fits = self._precompute_fits(self.pieces, self.valid_set, self.cell2idx, self.occ_keys)
+        self._build_placement_table(raw_fits)
+        # Every cell must be filled: only then do the local prunes prove a state dead
+        self.exact_cover = sum(len(oris[0]) for oris in self.pieces.values() if oris) == N
+
+        self.layout_hash = self._layout_hash()
+        self._symmetry = None
+        self._sym_root = None
+        self._colour = None
+        self._colour_reach: Dict[int, frozenset] = {}
+        self._cell_pids = None
+        self._lat_masks = None
+        self._batch = None
+
+    # --------------------------
+    # Pieces & order
+    # --------------------------
+    def _normalize_pieces(self, pieces_in):
+        pieces = {}
+        for k, oris in pieces_in.items():
+            norm_oris = []
+            for ori in oris:
+                norm_oris.append(tuple((int(a), int(b), int(c)) for (a,b,c) in ori))
+            pieces[str(k)] = tuple(norm_oris)
+        return pieces
+
+    def _pick_order(self, pieces):
+        keys = set(pieces.keys())
+        ordered = [k for k in _ORDER_PREF if k in keys]
+        remaining = sorted(keys.difference(_ORDER_PREF))
+        return tuple(ordered + remaining)
+
+    # --------------------------
+    # Grid & fits
+    # --------------------------
+    def _build_grid(self, valid_set: Set[Tuple[int,int,int]]):
+        idx2cell = list(sorted(valid_set))
+        cell2idx = {c: i for i, c in enumerate(idx2cell)}
+        neighbors: List[Tuple[int, ...]] = []
+        is_boundary: List[bool] = []
+        for (i,j,k) in idx2cell:
+            lst = []
+            for di,dj,dk in _NEIGH:
+                c = (i+di, j+dj, k+dk)
+                if c in cell2idx:
+                    lst.append(cell2idx[c])
+            neighbors.append(tuple(lst))
+            on_boundary = False
+            for di,dj,dk in _NEIGH:
+                c = (i+di, j+dj, k+dk)
+                if c not in cell2idx:
+                    on_boundary = True
+                    break
+            is_boundary.append(on_boundary)
+        return tuple(idx2cell), cell2idx, tuple(neighbors), tuple(is_boundary)
+
+    def _precompute_fits(self, pieces, valid_set, cell2idx, occ_keys):
+        """
+        fits[piece][origin_idx] -> tuple of (ori_idx, mask, cells_idx, zkey),
+        where zkey is the XOR of occ_keys over the placement's cells.
+        """
+        fits = {}
+        for key, oris in pieces.items():
+            per_origin = {}
+            for (oi,oj,ok), oidx in ((c, cell2idx[c]) for c in valid_set if c in cell2idx):
+                lst = []
+                for ori_idx, ori in enumerate(oris):
+                    ok_all = True
+                    idxs = []
+                    for (dx,dy,dz) in ori:
+                        c = (oi+dx, oj+dy, ok+dz)
+                        idx = cell2idx.get(c)
+                        if idx is None:
+                            ok_all = False
+                            break
+                        idxs.append(idx)
+                    if ok_all:
+                        mask = 0
+                        zkey = 0
+                        for ii in idxs:
+                            mask |= (1 << ii)
+                            zkey ^= occ_keys[ii]
+                        lst.append((ori_idx, mask, tuple(idxs), zkey))
+                if lst:
+                    per_origin[oidx] = tuple(lst)
+            fits[key] = per_origin
+        return fits
+
+    def _build_placement_table(self, raw_fits) -> None:
+        """
+        Enumerate every fit once into a global placement id (pid), grouped by piece
+        (in self.order), then origin, then orientation. Column arrays:
+          pl_piece / pl_origin / pl_ori : array('i')     piece index, origin idx, orientation idx
+          pl_zkey                       : array('Q')     Zobrist key of the placement's cells
+        plus Python views for the hot loop: pl_mask (int bitmask) and pl_cells_t (cell tuples).
+
+        Lookups, all in pids:
+          fits[piece][origin_idx] -> tuple of pids
+          fits_flat[piece]        -> every pid of the piece, by origin
+          cover[piece][cell]      -> pids of the piece whose cells include `cell`
+        """
+        self.piece_ids: Tuple[str, ...] = tuple(self.order)
+        self.piece_index = {p: i for i, p in enumerate(self.piece_ids)}
+        self.pl_piece = array("i")
+        self.pl_origin = array("i")
+        self.pl_ori = array("i")
+        self.pl_zkey = array("Q")
+        pl_mask: List[int] = []
+        pl_cells_t: List[Tuple[int, ...]] = []
+        self.fits = {}
+        self.fits_flat = {}
+        self.cover = {}
+        for key in self.piece_ids:
+            per_origin = raw_fits.get(key, {})
+            by_origin = {}
+            flat = []
+            by_cell: Dict[int, List[int]] = {}
+            for origin_idx in sorted(per_origin):
+                pids = []
+                for (ori_idx, mask, cells_idx, zkey) in per_origin[origin_idx]:
+                    pid = len(pl_mask)
+                    self.pl_piece.append(self.piece_index[key])
+                    self.pl_origin.append(origin_idx)
+                    self.pl_ori.append(ori_idx)
+                    self.pl_zkey.append(zkey)
+                    pl_mask.append(mask)
+                    pl_cells_t.append(cells_idx)
+                    pids.append(pid)
+                    for c in cells_idx:
+                        by_cell.setdefault(c, []).append(pid)
+                by_origin[origin_idx] = tuple(pids)
+                flat.extend(pids)
+            self.fits[key] = by_origin
+            self.fits_flat[key] = tuple(flat)
+            self.cover[key] = {c: tuple(lst) for c, lst in by_cell.items()}
+        self.pl_mask = pl_mask
+        self.pl_cells_t = tuple(pl_cells_t)
+        self.n_placements = len(pl_mask)
+
+    def _init_lattice(self) -> None:
+        """
+        Lay cells out in an (i,j,k) box padded by one cell on every side, so
+        each FCC direction in _NEIGH is a fixed bit shift and never wraps.
+        """
+        cells = self.idx2cell
+        self.lat_pad_bit: Tuple[int, ...] = ()
+        self.lat_shifts: Tuple[int, ...] = ()
+        self.lat_valid = 0
+        self.lat_boundary = 0
+        if not cells:
+            return
+        i0 = min(c[0] for c in cells) - 1
+        j0 = min(c[1] for c in cells) - 1
+        k0 = min(c[2] for c in cells) - 1
+        nj = max(c[1] for c in cells) - j0 + 2
+        nk = max(c[2] for c in cells) - k0 + 2
+        SI, SJ = nj * nk, nk
+        pad_bit = tuple(1 << ((i-i0)*SI + (j-j0)*SJ + (k-k0)) for (i,j,k) in cells)
+        valid = 0
+        boundary = 0
+        for idx, b in enumerate(pad_bit):
+            valid |= b
+            if self.is_boundary[idx]:
+                boundary |= b
+        self.lat_pad_bit = pad_bit
+        self.lat_shifts = tuple(di*SI + dj*SJ + dk for (di,dj,dk) in _NEIGH)
+        self.lat_valid = valid
+        self.lat_boundary = boundary
+
+    def lattice_masks(self) -> Tuple[Tuple[int,int,int], ...]:
+        """
+        pid -> (cells, cells + neighbours, neighbours only) as padded masks.
+        Computed on first use and cached (read-only for engines).
+        """
+        if self._lat_masks is None:
+            pad_bit, neighbors = self.lat_pad_bit, self.neighbors
+            out = []
+            for cells_idx in self.pl_cells_t:
+                pm = 0
+                ring = 0
+                for c in cells_idx:
+                    pm |= pad_bit[c]
+                    for n in neighbors[c]:
+                        ring |= pad_bit[n]
+                out.append((pm, ring | pm, ring & ~pm))
+            self._lat_masks = tuple(out)
+        return self._lat_masks
+
+    def batch_table(self) -> Dict:
+        """
+        NumPy arrays over every placement id, computed on first use and cached (read-only):
+          cells   (P,W)   cell indices            origin / ori (P,)  origin and orientation index
+          ring    (P,R)   neighbour-only cells    ringcnt (P,R)      placement cells adjacent to each
+          step_idx / step_delta (P,S)  cells whose batch board value changes when the placement
+                               is placed, and by how much (+BATCH_FILLED for its own cells,
+                               -1 per placement cell adjacent, i.e. the empty-neighbour degree)
+          coords  (N,3)   cell coordinates        boundary (N+1,)    boundary flags
+          near    (N,N+1) cell -> its neighbours
+          piece   (P,)    piece index             cell_pids[cell]    pids of any piece covering it
+          flat[piece]     pid array (as in self.fits_flat)
+        Index N pads ring / step_idx and is a sentinel that always reads as "filled".
+        """
+        if self._batch is None:
+            N = len(self.idx2cell)
+            neighbors = self.neighbors
+            width = max((len(c) for c in self.pl_cells_t), default=0)
+            rings, cnts, steps = [], [], []
+            for cells_idx in self.pl_cells_t:
+                own = set(cells_idx)
+                cnt: Dict[int, int] = {}
+                for u in cells_idx:
+                    for v in neighbors[u]:
+                        cnt[v] = cnt.get(v, 0) + 1
+                delta = {v: -n for v, n in cnt.items()}
+                for u in cells_idx:
+                    delta[u] = delta.get(u, 0) + BATCH_FILLED
+                steps.append(sorted(delta.items()))
+                ring_cells = sorted(v for v in cnt if v not in own)
+                rings.append(ring_cells)
+                cnts.append([cnt[v] for v in ring_cells])
+            P = self.n_placements
+            R = max((len(r) for r in rings), default=0)
+            ring = np.full((P, R), N, dtype=np.intp)
+            ringcnt = np.zeros((P, R), dtype=np.int16)
+            S = max((len(st) for st in steps), default=0)
+            step_idx = np.full((P, S), N, dtype=np.intp)
+            step_delta = np.zeros((P, S), dtype=np.int16)
+            for q in range(P):
+                ring[q, :len(rings[q])] = rings[q]
+                ringcnt[q, :len(cnts[q])] = cnts[q]
+                step_idx[q, :len(steps[q])], step_delta[q, :len(steps[q])] = zip(*steps[q])
+            near = np.zeros((N, N + 1), dtype=bool)
+            for c, nb in enumerate(neighbors):
+                near[c, list(nb)] = True
+            self._batch = {
+                "cells": np.array(self.pl_cells_t, dtype=np.intp).reshape(P, width),
+                "origin": np.array(self.pl_origin, dtype=np.intp),
+                "ori": np.array(self.pl_ori, dtype=np.intp),
+                "piece": np.array(self.pl_piece, dtype=np.intp),
+                "ring": ring,
+                "ringcnt": ringcnt,
+                "step_idx": step_idx,
+                "step_delta": step_delta,
+                "coords": np.array(self.idx2cell, dtype=np.int64).reshape(N, 3),
+                "boundary": np.array(list(self.is_boundary) + [False], dtype=bool),
+                "near": near,
+                "flat": {p: np.array(q, dtype=np.intp) for p, q in self.fits_flat.items()},
+                "cell_pids": tuple(np.array(q, dtype=np.intp) for q in self.cell_pids()),
+            }
+        return self._batch
+
+    def _layout_hash(self) -> int:
+        """64-bit fingerprint of everything a TT key depends on (cell indexing, pieces)."""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(repr((self.idx2cell, sorted(self.pieces.items()), self.piece_keys, self.occ_keys)).encode())
+        return int.from_bytes(h.digest(), "little")
+
+    def _init_zobrist(self, N: int):
+        # keys depend on cell index and piece name only, never on a search order
+        rnd = random.Random(DEFAULT_RNG_SEED ^ 0x9E3779B97F4A7C15)
+        occ_keys = [rnd.getrandbits(64) for _ in range(N)]
+        piece_keys = {p: rnd.getrandbits(64) for p in sorted(self.pieces)}
+        return tuple(occ_keys), piece_keys
+
+    # --------------------------
+    # Symmetry (container automorphisms)
+    # --------------------------
+    def _container_automorphisms(self) -> List[Tuple[int, ...]]:
+        """
+        Lattice symmetries (rotation/reflection + translation) that map the container
+        onto itself and every piece's orientation set onto itself, as cell permutations.
+        The identity is always first.
+        """
+        def shape(cells):
+            m = min(cells)
+            return tuple(sorted((a - m[0], b - m[1], c - m[2]) for (a, b, c) in cells))
+
+        piece_shapes = {p: set(shape(o) for o in oris) for p, oris in self.pieces.items()}
+        cells = self.idx2cell
+        lo = cells[0]   # idx2cell is sorted: lexicographic minimum
+        perms = []
+        for op in _fcc_point_group():
+            img = [op(c) for c in cells]
+            m = min(img)
+            t = (lo[0] - m[0], lo[1] - m[1], lo[2] - m[2])
+            img = [(a + t[0], b + t[1], c + t[2]) for (a, b, c) in img]
+            if any(c not in self.cell2idx for c in img):
+                continue
+            if any(shape([op(c) for c in o]) not in piece_shapes[p]
+                   for p, oris in self.pieces.items() for o in oris):
+                continue
+            perms.append(tuple(self.cell2idx[c] for c in img))
+        identity = tuple(range(len(cells)))
+        perms.sort(key=lambda g: g != identity)
+        return perms
+
+    def symmetry(self) -> Tuple[List[Tuple[int, ...]], array]:
+        """
+        (automorphisms as cell permutations, pid -> smallest pid in its orbit).
+        Computed on first use and cached; both are read-only for engines.
+        """
+        if self._symmetry is None:
+            perms = self._container_automorphisms()
+            by_cells = {(self.pl_piece[q], frozenset(self.pl_cells_t[q])): q for q in range(self.n_placements)}
+            orbit = array("i", range(self.n_placements))
+            for g in perms[1:]:
+                for q in range(self.n_placements):
+                    img = by_cells.get((self.pl_piece[q], frozenset(g[c] for c in self.pl_cells_t[q])))
+                    if img is not None and img < orbit[q]:
+                        orbit[q] = img
+            # orbits are closed under the group, so one pass over all elements already yields the minimum
+            self._symmetry = (perms, orbit)
+        return self._symmetry
+
+    def symmetry_root(self) -> Tuple[Optional[str], int]:
+        """
+        Root branching point with the fewest placement orbits: (piece, -1) = every placement
+        of that piece (only when every piece has to be placed, i.e. exact_cover), or
+        (None, cell) = every placement covering that cell. Keeping one placement per orbit
+        at either is complete: some image of every solution uses the kept one.
+        Computed on first use and cached.
+        """
+        if self._sym_root is None:
+            orbit = self.symmetry()[1]
+            n_cell, cell = min((len({orbit[q] for q in pids}), c) for c, pids in enumerate(self.cell_pids()))
+            self._sym_root = (None, cell)
+            if self.exact_cover:
+                n_piece, piece = min((len({orbit[q] for q in pids}), p) for p, pids in self.fits_flat.items())
+                if n_piece < n_cell:
+                    self._sym_root = (piece, -1)
+        return self._sym_root
+
+    def cell_pids(self) -> Tuple[Tuple[int, ...], ...]:
+        """cell -> every pid (any piece) covering it. Computed on first use and cached."""
+        if self._cell_pids is None:
+            by_cell: List[List[int]] = [[] for _ in self.idx2cell]
+            for q, cells_idx in enumerate(self.pl_cells_t):
+                for c in cells_idx:
+                    by_cell[c].append(q)
+            self._cell_pids = tuple(tuple(lst) for lst in by_cell)
+        return self._cell_pids
+
+    # --------------------------
+    # Colour counts (sublattice parity invariants)
+    # --------------------------
+    def colour_table(self) -> Optional[Dict]:
+        """
+        Colour-count tables, computed on first use and cached (read-only for engines).
+        Colour counts are packed into one int, `shift` bits per class:
+          full      : counts over the whole container
+          masks     : per class, bitmask of its cells
+          pl_colour : pid -> counts over the placement's cells
+          unit      : piece -> packed +1 for the piece's colour type in a remaining-types key
+                      (a type = pieces whose placements realise the same set of counts)
+          all_types : key with every piece remaining
+        None unless the pieces exactly cover the container (otherwise empties may stay empty).
+        """
+        if self._colour is None:
+            N = len(self.idx2cell)
+            if not self.exact_cover:
+                self._colour = False
+                return None
+            shift = (N + 4).bit_length()
+            cls = [_colour_class(c) for c in self.idx2cell]
+            masks = [0] * N_COLOURS
+            for idx, c in enumerate(cls):
+                masks[c] |= 1 << idx
+            pl_colour = []
+            vecs: Dict[int, Set[int]] = defaultdict(set)
+            for q in range(self.n_placements):
+                v = 0
+                for ci in self.pl_cells_t[q]:
+                    v += 1 << (shift * cls[ci])
+                pl_colour.append(v)
+                vecs[self.pl_piece[q]].add(v)
+            types: List[frozenset] = []
+            unit: Dict[str, int] = {}
+            tshift = len(self.piece_ids).bit_length()
+            for pi, p in enumerate(self.piece_ids):
+                t = frozenset(vecs[pi])
+                if t not in types:
+                    types.append(t)
+                unit[p] = 1 << (tshift * types.index(t))
+            self._colour = {
+                "shift": shift,
+                "full": sum(_popcount(m) << (shift * c) for c, m in enumerate(masks)),
+                "masks": tuple(masks),
+                "pl_colour": tuple(pl_colour),
+                "unit": unit,
+                "all_types": sum(unit.values()),
+                "types": tuple(types),
+                "tshift": tshift,
+            }
+        return self._colour or None
+
+    def colour_reach(self, key: int) -> frozenset:
+        """
+        Packed colour counts the pieces in remaining-types `key` can cover exactly, clipped
+        to what an empty region can hold once the other pieces are placed: at most the
+        container's counts, at least those minus the most each placed piece could have taken
+        per class. Memoised per key; each key extends a smaller one by a single piece.
+        """
+        got = self._colour_reach.get(key)
+        if got is not None:
+            return got
+        tab = self._colour
+        if not key:
+            got = frozenset((0,))
+        else:
+            tshift = tab["tshift"]
+            tmask = (1 << tshift) - 1
+            t = 0
+            while not (key >> (tshift * t)) & tmask:
+                t += 1
+            base = self.colour_reach(key - (1 << (tshift * t)))
+            shift, full, types = tab["shift"], tab["full"], tab["types"]
+            fmask = (1 << shift) - 1
+            placed = [((tab["all_types"] - key) >> (tshift * u)) & tmask for u in range(len(types))]
+            bounds = []
+            for c in range(N_COLOURS):
+                sh = shift * c
+                hi = (full >> sh) & fmask
+                lo = hi - sum(n * max(((v >> sh) & fmask for v in types[u]), default=0)
+                              for u, n in enumerate(placed))
+                bounds.append((sh, lo, hi))
+            out = set()
+            for r in base:
+                for v in types[t]:
+                    s = r + v
+                    if s not in out and all(lo <= ((s >> sh) & fmask) <= hi for sh, lo, hi in bounds):
+                        out.add(s)
+            got = frozenset(out)
+        self._colour_reach[key] = got
+        return got
+
+
 class SolverEngine:
     """
     Stateless inputs:
       - pieces: dict[str, tuple[tuple[(dx,dy,dz), ...], ...]]  (orientations per piece)
       - valid_set: set[(i,j,k)]                                (container cells)
+      - or problem: a PreparedProblem built from them (pieces/valid_set are then ignored)
 
     Maintains search state and stats during run.
     """
@@ -64,51 +765,96 @@ class SolverEngine:
     # Construction
     # --------------------------
     def __init__(self,
-                 pieces: Dict[str, Tuple[Tuple[Tuple[int,int,int], ...], ...]],
-                 valid_set: Set[Tuple[int,int,int]]):
-        # Inputs
-        self.pieces = self._normalize_pieces(pieces)
-        self.valid_set = set(valid_set)
+                 pieces: Optional[Dict[str, Tuple[Tuple[Tuple[int,int,int], ...], ...]]] = None,
+                 valid_set: Optional[Set[Tuple[int,int,int]]] = None,
+                 tt_mb: Optional[float] = None,
+                 stats_level: Optional[str] = None,
+                 problem: Optional[PreparedProblem] = None,
+                 refuted: Optional[TranspositionTable] = None):
+        # Inputs: grid, fits, Zobrist keys, placement table (shared, read-only)
+        if problem is None:
+            problem = PreparedProblem(pieces, valid_set)
+        self.problem = problem
+        for name in PreparedProblem.SHARED:
+            setattr(self, name, getattr(problem, name))
+        self.order = problem.order
 
         # Tunables (mutable; caller may update after construct)
         self.RNG_SEED          = DEFAULT_RNG_SEED
         self.BRANCH_CAP_OPEN   = DEFAULT_BRANCH_CAP_OPEN
         self.BRANCH_CAP_TIGHT  = DEFAULT_BRANCH_CAP_TIGHT
         self.ROULETTE_MODE     = DEFAULT_ROULETTE_MODE
-        self.TT_MAX            = DEFAULT_TT_MAX
-        self.TT_TRIM_KEEP      = DEFAULT_TT_TRIM_KEEP
+        self.TT_MB             = DEFAULT_TT_MB if tt_mb is None else tt_mb   # TT is sized at construction (0 = none)
         self.EXPOSURE_WEIGHT          = DEFAULT_EXPOSURE_WEIGHT
         self.BOUNDARY_EXPOSURE_WEIGHT = DEFAULT_BOUNDARY_EXPOSURE_WEIGHT
         self.LEAF_WEIGHT              = DEFAULT_LEAF_WEIGHT
         self.deg2_corridor     = DEFAULT_DEG2_CORRIDOR
+        self.branching         = DEFAULT_BRANCHING
 
         # ---- minimal addition: runtime toggle for hole-%4 prune ----
         self.hole_mod4         = DEFAULT_HOLE_MOD4_DETECT
         # ------------------------------------------------------------
+        self.lattice_bits      = DEFAULT_LATTICE_BITBOARD   # see enable_lattice_bits
+        self.batch_eval        = DEFAULT_BATCH_EVAL         # see enable_batch_eval
 
-        # Grid
-        (self.idx2cell,
-         self.cell2idx,
-         self.neighbors,
-         self.is_boundary) = self._build_grid(self.valid_set)
-
-        # Precompute
-        self.fits = self._precompute_fits(self.pieces, self.valid_set, self.cell2idx)
+        # Instrumentation (fixed for the engine's lifetime)
+        self.stats_level = DEFAULT_STATS_LEVEL if stats_level is None else stats_level
+        if self.stats_level not in STATS_LEVELS:
+            raise ValueError(f"stats_level must be one of {STATS_LEVELS}, got {self.stats_level!r}")
+        self._stats_counters = self.stats_level != "off"
+        self._stats_full = self.stats_level == "full"
 
-        # Order
-        self.order = self._pick_order(self.pieces)
+        # TT (heuristic: a recorded state prunes later visits, so it is private to this engine)
+        self.TT: Optional[TranspositionTable] = TranspositionTable(self.TT_MB) if self.TT_MB > 0 else None
+        # Proven dead states (see _refuted_record); may be shared with other engines and processes
+        self.refuted: Optional[TranspositionTable] = refuted
+        self.refuted_log: Optional[List[int]] = None   # new entries (key tag | depth), if the caller collects them
 
-        # TT init
-        random.seed(self.RNG_SEED)
-        N = len(self.idx2cell)
-        self.occ_keys, self.depth_keys = self._init_zobrist(N, len(self.order))
-        self.TT: Dict[int, int] = {}
+        # Anchor buckets (empty-neighbor degree per cell, bitmask of empty cells per degree)
+        self.deg, self.deg_buckets = self._init_anchor_buckets()
 
         # State
         self.cursor = 0
         self.occ_bits = 0
-        self.placements: List[Dict] = []     # each: {"piece", "origin_idx", "ori_idx", "mask", "cells_idx"}
-        self.frontier: List[deque] = []      # per-depth deque of choices
+        self.occ_hash = 0                    # XOR of occ_keys over occ_bits (kept incrementally)
+        self.piece_hash = 0                  # XOR of piece_keys over placed pieces
+        self.lat_empty = 0                   # padded bitboard of empty cells (kept when lattice_bits)
+        self._lat_masks: Tuple[Tuple[int,int,int], ...] = ()
+
+        # Empty-region components (incremental; see enable_component_tracking)
+        self.comp_track = False
+        self.comp_of: List[int] = []         # cell -> component id (-1 = filled)
+        self.comp_mask: Dict[int, int] = {}  # component id -> bitmask of its cells
+        self.comp_bad = 0                    # components whose size % 4 != 0
+        self._comp_next = 0
+        self._comp_trail: List = []          # per placement: undo data (None = placed before tracking)
+        # Root symmetry breaking (see enable_symmetry_breaking)
+        self.symmetry_break = DEFAULT_SYMMETRY_BREAK
+        self.sym_cell_perm: List[Tuple[int, ...]] = []   # per automorphism: cell idx -> cell idx
+        self.sym_orbit: Optional[array] = None           # pid -> smallest pid in its orbit
+        self.sym_root: Tuple[Optional[str], int] = (None, -1)   # root (piece, cell), see PreparedProblem.symmetry_root
+        # Component decomposition (see enable_decomposition)
+        self.decompose = DEFAULT_DECOMPOSE
+        self._dframe: Dict[int, list] = {}   # depth -> [focus region, key, prune mark, filled]
+        self.comp_nogood: Set[int] = set()   # region hash ^ piece_hash of components that cannot be filled
+        self.decomp_prunes = 0
+        # Colour-count prune (see enable_colour_check)
+        self.colour_check = DEFAULT_COLOUR_CHECK
+        self._colour: Optional[Dict] = None
+        self._colour_node: Optional[Tuple] = None   # (occ_bits, piece_hash, empty counts, remaining-types key)
+        self.colour_prunes = 0
+        # Forward checking (see enable_forward_check)
+        self.forward_check = DEFAULT_FORWARD_CHECK
+        self.fc_dead = bytearray()           # pid -> 1 once it overlaps the board or its piece is placed
+        self.fc_cell_live: List[int] = []    # cell -> live placements covering it
+        self.fc_piece_live: List[int] = []   # piece index -> live placements of the piece
+        self._fc_trail: List = []            # per placement: pids it killed (None = placed before enabling)
+        self.fc_prunes = 0
+        self.fc_forced = 0
+
+        self.placements = array("i")         # placement ids, in placement order
+        self.frontier: List[array] = []      # per-depth placement ids, best LAST (consumed with pop())
+        self.frontier_proof: List[bool] = [] # per depth: complete choices, every child tried so far refuted
         self.solved = False
         self.dirty = False
 
@@ -117,12 +863,12 @@ class SolverEngine:
         self._t0 = time.time()
 
         # Search bookkeeping / stats
-        self.try_counts = defaultdict(int)     # (piece, origin_idx, ori_idx) -> tries
+        self.try_counts = array("i", [0]) * self.n_placements   # placement id -> tries
         self.anchor_seen: Set[int] = set()
         self.transitions = defaultdict(int)    # (prev_anchor, cur_anchor) -> count
         self.last_anchor: Optional[int] = None
 
-        # Histograms / counters
+        # Histograms / counters (maintained only at the matching stats_level)
         self.stat_pruned_isolated = 0
         self.stat_pruned_cavity   = 0  # used for hole-%4 prunes
         self.stat_considered      = 0
@@ -140,6 +886,7 @@ class SolverEngine:
         # TT stats
         self.tt_hits   = 0
         self.tt_prunes = 0
+        self.refuted_prunes = 0
 
         # Runtime toggles (updated per-depth)
         self.branch_cap_cur = self.BRANCH_CAP_OPEN
@@ -149,6 +896,9 @@ class SolverEngine:
         # Best depth ever (for UX; maintained externally in some setups too)
         self.best_depth_ever = 0
 
+        # Work-unit root: the search never backtracks above this depth (see seed_prefix)
+        self.root_depth = 0
+
     # --------------------------
     # Public helpers
     # --------------------------
@@ -161,132 +911,110 @@ class SolverEngine:
     def elapsed_seconds(self) -> float:
         return time.time() - self._t0
 
-    # --------------------------
-    # Grid & fits
-    # --------------------------
-    def _build_grid(self, valid_set: Set[Tuple[int,int,int]]):
-        idx2cell = list(sorted(valid_set))
-        cell2idx = {c: i for i, c in enumerate(idx2cell)}
-        neighbors: List[Tuple[int, ...]] = []
-        is_boundary: List[bool] = []
-        for (i,j,k) in idx2cell:
-            lst = []
-            for di,dj,dk in _NEIGH:
-                c = (i+di, j+dj, k+dk)
-                if c in cell2idx:
-                    lst.append(cell2idx[c])
-            neighbors.append(tuple(lst))
-            on_boundary = False
-            for di,dj,dk in _NEIGH:
-                c = (i+di, j+dj, k+dk)
-                if c not in cell2idx:
-                    on_boundary = True
-                    break
-            is_boundary.append(on_boundary)
-        return tuple(idx2cell), cell2idx, tuple(neighbors), tuple(is_boundary)
-
-    def _precompute_fits(self, pieces, valid_set, cell2idx):
-        fits = {}
-        for key, oris in pieces.items():
-            per_origin = {}
-            for (oi,oj,ok), oidx in ((c, cell2idx[c]) for c in valid_set if c in cell2idx):
-                lst = []
-                for ori_idx, ori in enumerate(oris):
-                    ok_all = True
-                    idxs = []
-                    for (dx,dy,dz) in ori:
-                        c = (oi+dx, oj+dy, ok+dz)
-                        idx = cell2idx.get(c)
-                        if idx is None:
-                            ok_all = False
-                            break
-                        idxs.append(idx)
-                    if ok_all:
-                        mask = 0
-                        for ii in idxs:
-                            mask |= (1 << ii)
-                        lst.append((ori_idx, mask, tuple(idxs)))
-                if lst:
-                    per_origin[oidx] = tuple(lst)
-            fits[key] = per_origin
-        return fits
-
-    # --------------------------
-    # Pieces & order
-    # --------------------------
-    def _normalize_pieces(self, pieces_in):
-        pieces = {}
-        for k, oris in pieces_in.items():
-            norm_oris = []
-            for ori in oris:
-                norm_oris.append(tuple((int(a), int(b), int(c)) for (a,b,c) in ori))
-            pieces[str(k)] = tuple(norm_oris)
-        return pieces
+    def stats_snapshot(self) -> Dict:
+        """JSON-ready view of the instrumentation collected at this engine's stats_level."""
+        out: Dict = {"stats_level": self.stats_level}
+        if self._stats_counters:
+            out.update({
+                "considered": self.stat_considered,
+                "pruned_isolated": self.stat_pruned_isolated,
+                "pruned_cavity": self.stat_pruned_cavity,
+                "fallback_piece": dict(self.stat_fallback_piece),
+                "tt_prunes": self.tt_prunes,
+                "refuted_prunes": self.refuted_prunes,
+                "decomp_prunes": self.decomp_prunes,
+                "colour_prunes": self.colour_prunes,
+                "fc_prunes": self.fc_prunes,
+                "fc_forced": self.fc_forced,
+            })
+        if self._stats_full:
+            def hist(h):
+                return {str(k): h[k] for k in sorted(h)}
+            out.update({
+                "exposure_hist": hist(self.stat_exposure_hist),
+                "boundary_exposure_hist": hist(self.stat_boundary_exposure_hist),
+                "leaf_hist": hist(self.stat_leaf_hist),
+                "choices_hist": hist(self.stat_choices_hist),
+                "anchor_deg_hist": hist(self.stat_anchor_deg_hist),
+                "anchors_seen": len(self.anchor_seen),
+                "anchor_transitions": len(self.transitions),
+            })
+        return out
 
-    def _pick_order(self, pieces):
-        keys = set(pieces.keys())
-        ordered = [k for k in _ORDER_PREF if k in keys]
-        remaining = sorted(keys.difference(_ORDER_PREF))
-        return tuple(ordered + remaining)
+    def placement_piece(self, pid: int) -> str:
+        return self.piece_ids[self.pl_piece[pid]]
 
-    # --------------------------
-    # Bit helpers
-    # --------------------------
-    @staticmethod
-    def _is_occupied(bitset: int, idx: int) -> int:
-        return (bitset >> idx) & 1
+    def placement_cells(self, pid: int) -> Tuple[int, ...]:
+        return self.pl_cells_t[pid]
 
     # --------------------------
     # Anchor select
     # --------------------------
-    def _neighbor_degree(self, idx: int, occ_bits: int) -> int:
-        d = 0
-        for n in self.neighbors[idx]:
-            if not self._is_occupied(occ_bits, n):
-                d += 1
-        return d
-
-    def _select_anchor(self, N: int, occ_bits: int) -> Tuple[Optional[int], Optional[int]]:
-        best = -1
-        best_deg = 10**9
-        for idx in range(N):
-            if not self._is_occupied(occ_bits, idx):
-                deg = self._neighbor_degree(idx, occ_bits)
-                if deg < best_deg or (deg == best_deg and (best < 0 or idx < best)):
-                    best = idx
-                    best_deg = deg
-        return (None, None) if best < 0 else (best, best_deg)
+    def _init_anchor_buckets(self):
+        """
+        deg[idx]        : number of empty neighbors of idx (kept for filled cells too)
+        deg_buckets[d]  : bitmask of EMPTY cells whose empty-neighbor degree is d
+        """
+        deg = [len(nbrs) for nbrs in self.neighbors]
+        buckets = [0] * (len(_NEIGH) + 1)
+        for idx, d in enumerate(deg):
+            buckets[d] |= (1 << idx)
+        return deg, buckets
+
+    def _buckets_fill(self, cells_idx: Tuple[int, ...], occ_after: int) -> None:
+        deg = self.deg
+        buckets = self.deg_buckets
+        neighbors = self.neighbors
+        for c in cells_idx:
+            buckets[deg[c]] &= ~(1 << c)
+        for c in cells_idx:
+            for n in neighbors[c]:
+                d = deg[n]
+                deg[n] = d - 1
+                if not (occ_after >> n) & 1:
+                    bit = 1 << n
+                    buckets[d] &= ~bit
+                    buckets[d-1] |= bit
+
+    def _buckets_clear(self, cells_idx: Tuple[int, ...], occ_after: int) -> None:
+        deg = self.deg
+        buckets = self.deg_buckets
+        neighbors = self.neighbors
+        for c in cells_idx:
+            for n in neighbors[c]:
+                d = deg[n]
+                deg[n] = d + 1
+                if not (occ_after >> n) & 1 and n not in cells_idx:
+                    bit = 1 << n
+                    buckets[d] &= ~bit
+                    buckets[d+1] |= bit
+        for c in cells_idx:
+            buckets[deg[c]] |= (1 << c)
+
+    def _select_anchor(self) -> Tuple[Optional[int], Optional[int]]:
+        # Min (degree, idx) over empty cells: lowest non-empty bucket, lowest set bit.
+        # Buckets are maintained by _apply_place/_remove_last and always match occ_bits.
+        for d, b in enumerate(self.deg_buckets):
+            if b:
+                return (b & -b).bit_length() - 1, d
+        return None, None
 
     # --------------------------
     # Zobrist / TT
     # --------------------------
-    def _init_zobrist(self, N: int, depth_cap: int):
-        random.seed(self.RNG_SEED ^ 0x9E3779B97F4A7C15)
-        occ_keys = [random.getrandbits(64) for _ in range(N)]
-        depth_keys = [random.getrandbits(64) for _ in range(depth_cap+1)]
-        return occ_keys, depth_keys
-
-    def _tt_hash(self, occ_bits: int, cursor: int) -> int:
-        h = 0
-        x = occ_bits
-        idx = 0
-        while x:
-            if x & 1:
-                h ^= self.occ_keys[idx]
-            idx += 1
-            x >>= 1
-        if cursor < len(self.depth_keys):
-            h ^= self.depth_keys[cursor]
-        else:
-            h ^= (cursor * 11400714819323198485) & ((1<<64)-1)
-        return h
+    def _tt_key(self) -> int:
+        # occ_hash / piece_hash are XOR-updated in _apply_place/_remove_last: the XOR of
+        # occ_keys over filled cells and piece_keys over placed pieces. The placed set fixes
+        # the remaining set, so a key names "this empty region with these pieces left" for
+        # any piece order.
+        return self.occ_hash ^ self.piece_hash
 
     def _tt_should_prune(self) -> bool:
         if self.TT is None:
             return False
-        h = self._tt_hash(self.occ_bits, self.cursor)
+        h = self._tt_key()
         prev_best = self.TT.get(h)
-        if prev_best is not None and prev_best >= self.cursor:
+        if prev_best >= self.cursor:
             self.tt_hits += 1
             self.tt_prunes += 1
             return True
@@ -295,17 +1023,28 @@ class SolverEngine:
     def _tt_record(self) -> None:
         if self.TT is None:
             return
-        h = self._tt_hash(self.occ_bits, self.cursor)
-        prev = self.TT.get(h)
-        if (prev is None) or (self.cursor > prev):
-            self.TT[h] = self.cursor
-        if len(self.TT) > self.TT_MAX:
-            to_drop = len(self.TT) - self.TT_TRIM_KEEP
-            for _ in range(to_drop):
-                try:
-                    self.TT.pop(next(iter(self.TT)))
-                except StopIteration:
-                    break
+        self.TT.store(self._tt_key(), self.cursor)
+
+    def _refuted_prune(self) -> bool:
+        if self.refuted is None or self.refuted.get(self._tt_key()) < 0:
+            return False
+        self.refuted_prunes += 1
+        return True
+
+    def _refuted_record(self) -> None:
+        """
+        The current state's subtree was searched to exhaustion with complete branching,
+        no heuristic prune and no solution (frontier_proof): no order, opener or seed
+        can fill this region with these pieces, so the entry is valid for every run.
+        """
+        if self.refuted is None:
+            return
+        key = self._tt_key()
+        if self.refuted.get(key) >= 0:
+            return   # already known (e.g. an exhausted root stepped again)
+        self.refuted.store(key, self.cursor)
+        if self.refuted_log is not None:
+            self.refuted_log.append((key & TranspositionTable._TAG_MASK) | min(self.cursor, 254))
 
     # --------------------------
     # Pruning helpers
@@ -335,6 +1074,116 @@ class SolverEngine:
         return True
     # ------------------------------------------------------------------------
 
+    # ---- incremental empty components (hole-%4 in O(local region)) ----
+    def enable_component_tracking(self) -> None:
+        """
+        Track empty-region components across _apply_place/_remove_last.
+        A placement re-floods only the component it lands in; undo data is kept
+        on the placement record, so backtracking just restores labels.
+        """
+        self.comp_track = True
+        self._comp_rebuild()
+
+    def _comp_rebuild(self) -> None:
+        N = len(self.idx2cell)
+        self.comp_of = [-1] * N
+        self.comp_mask = {}
+        self.comp_bad = 0
+        self._comp_next = 0
+        empty = ((1 << N) - 1) & ~self.occ_bits
+        for cm in self._flood_components(empty):
+            self._comp_add(cm)
+
+    def _comp_add(self, cm: int) -> int:
+        cid = self._comp_next
+        self._comp_next += 1
+        self.comp_mask[cid] = cm
+        if _popcount(cm) & 3:
+            self.comp_bad += 1
+        comp_of = self.comp_of
+        x = cm
+        while x:
+            b = x & -x
+            comp_of[b.bit_length() - 1] = cid
+            x ^= b
+        return cid
+
+    def _flood_components(self, region: int) -> List[int]:
+        nbr_mask = self.nbr_mask
+        comps = []
+        while region:
+            low = region & -region
+            region ^= low
+            comp = low
+            stack = [low.bit_length() - 1]
+            while stack:
+                nb = nbr_mask[stack.pop()] & region
+                while nb:
+                    b = nb & -nb
+                    nb ^= b
+                    region ^= b
+                    comp |= b
+                    stack.append(b.bit_length() - 1)
+            comps.append(comp)
+        return comps
+
+    def _region_mod4_ok(self, region: int) -> bool:
+        if _popcount(region) & 3:
+            return False  # sizes sum to |region|, so some component is off
+        for cm in self._flood_components(region):
+            if _popcount(cm) & 3:
+                return False
+        return True
+
+    def _comp_fill(self, mask: int, cells_idx: Tuple[int, ...]):
+        """Split the component(s) hit by a placement; returns undo data."""
+        comp_of = self.comp_of
+        old = {}
+        for c in cells_idx:
+            cid = comp_of[c]
+            if cid >= 0 and cid not in old:
+                old[cid] = self.comp_mask[cid]
+        new_ids = []
+        for cid, cm in old.items():
+            del self.comp_mask[cid]
+            if _popcount(cm) & 3:
+                self.comp_bad -= 1
+            for sub in self._flood_components(cm & ~mask):
+                new_ids.append(self._comp_add(sub))
+        for c in cells_idx:
+            comp_of[c] = -1
+        return old, new_ids
+
+    def _comp_unfill(self, undo) -> None:
+        old, new_ids = undo
+        for cid in new_ids:
+            if _popcount(self.comp_mask.pop(cid)) & 3:
+                self.comp_bad -= 1
+        comp_of = self.comp_of
+        for cid, cm in old.items():
+            self.comp_mask[cid] = cm
+            if _popcount(cm) & 3:
+                self.comp_bad += 1
+            x = cm
+            while x:
+                b = x & -x
+                comp_of[b.bit_length() - 1] = cid
+                x ^= b
+
+    def _hole_mod4_ok_after(self, mask: int, cells_idx: Tuple[int, ...]) -> bool:
+        """Incremental _empties_mod4_ok(occ | mask): only the component under the placement is re-flooded."""
+        cid = self.comp_of[cells_idx[0]]
+        cm = self.comp_mask[cid]
+        if self.comp_bad - (1 if _popcount(cm) & 3 else 0) > 0:
+            return False  # another component is already off
+        return self._region_mod4_ok(cm & ~mask)
+
+    def _empties_mod4_ok_now(self) -> bool:
+        if self.comp_track:
+            return self.comp_bad == 0
+        return self._empties_mod4_ok(self.occ_bits)
+    # ------------------------------------------------------------------------
+
     def _creates_isolated_empty(self, occ_after: int, touched_idxs: Tuple[int, ...]) -> bool:
         neighbors = self.neighbors
         to_check = set()
@@ -389,18 +1238,430 @@ class SolverEngine:
         return leafs
 
     # --------------------------
-    # Build choices (ranking, cap, roulette)
+    # Forward checking (live-placement counters)
     # --------------------------
-    def _build_choices_bits(self, piece_key: str) -> List[Tuple[int,int,int,Tuple[int,...]]]:
+    def enable_forward_check(self) -> None:
+        """
+        Keep, across _apply_place/_remove_last, the number of live placements (remaining
+        piece, no overlap with the board) covering each cell and per piece. Each placement
+        kills what it overlaps plus its piece's other placements and keeps the killed pids
+        on the placement record; backtracking revives exactly those.
+        """
+        self.forward_check = True
+        self._cell_pids = self.problem.cell_pids()
+        self._fc_rebuild()
+
+    def _fc_rebuild(self) -> None:
         occ = self.occ_bits
-        fits_map = self.fits[piece_key]
-        neighbors = self.neighbors
-        idx2cell = self.idx2cell
-        N = len(idx2cell)
-        choices = []
+        placed = set(self.pl_piece[pid] for pid in self.placements)
+        pl_mask, pl_piece, pl_cells_t = self.pl_mask, self.pl_piece, self.pl_cells_t
+        self.fc_dead = bytearray(self.n_placements)
+        self.fc_cell_live = [0] * len(self.idx2cell)
+        self.fc_piece_live = [0] * len(self.piece_ids)
+        for q in range(self.n_placements):
+            if (pl_mask[q] & occ) or pl_piece[q] in placed:
+                self.fc_dead[q] = 1
+                continue
+            self.fc_piece_live[pl_piece[q]] += 1
+            for c in pl_cells_t[q]:
+                self.fc_cell_live[c] += 1
+
+    def _fc_fill(self, pid: int) -> List[int]:
+        dead, cell_live, piece_live = self.fc_dead, self.fc_cell_live, self.fc_piece_live
+        pl_piece, pl_cells_t = self.pl_piece, self.pl_cells_t
+        killed = []
+        kill = killed.append
+        for group in (*(self._cell_pids[c] for c in pl_cells_t[pid]), self.fits_flat[self.piece_ids[pl_piece[pid]]]):
+            for q in group:
+                if dead[q]:
+                    continue
+                dead[q] = 1
+                kill(q)
+                piece_live[pl_piece[q]] -= 1
+                for c in pl_cells_t[q]:
+                    cell_live[c] -= 1
+        return killed
+
+    def _fc_unfill(self, killed: List[int]) -> None:
+        dead, cell_live, piece_live = self.fc_dead, self.fc_cell_live, self.fc_piece_live
+        pl_piece, pl_cells_t = self.pl_piece, self.pl_cells_t
+        for q in killed:
+            dead[q] = 0
+            piece_live[pl_piece[q]] += 1
+            for c in pl_cells_t[q]:
+                cell_live[c] += 1
+
+    def _fc_live_pid(self, pids) -> int:
+        dead = self.fc_dead
+        for q in pids:
+            if not dead[q]:
+                return q
+        return -1
+
+    def _fc_frontier(self) -> Optional[array]:
+        """
+        Verdict of the counters at this node: empty array (a remaining piece, or in piece-first
+        an empty cell, has no live placement), a single forced pid, or None (branch normally).
+        Cell-first leaves cells to the MRV choice, which reads the same counters, and forces a
+        piece only when no cell is down to one placement. Piece-first only forces placements of
+        the piece this depth places. A forced placement still has to pass the candidate prunes;
+        if it does not, the node is dead.
+        """
+        cell_live, piece_live = self.fc_cell_live, self.fc_piece_live
+        cell_first = self.branching == "cell-first"
+        here = None if cell_first else self.piece_index[self.order[self.cursor]]
+        forced = -1
+        for p in self.remaining_pieces():
+            n = piece_live[self.piece_index[p]]
+            if n == 0:
+                self.fc_prunes += 1
+                return array("i")
+            if n == 1 and forced < 0 and (cell_first or self.piece_index[p] == here):
+                forced = self._fc_live_pid(self.fits_flat[p])
+        if cell_first:
+            if forced >= 0 and self._select_mrv_cell((), 0)[1] <= 1:
+                forced = -1
+        else:
+            empty = ((1 << len(self.idx2cell)) - 1) & ~self.occ_bits
+            while empty:
+                b = empty & -empty
+                empty ^= b
+                c = b.bit_length() - 1
+                n = cell_live[c]
+                if n == 0:
+                    self.fc_prunes += 1
+                    return array("i")
+                if n == 1 and forced < 0:
+                    q = self._fc_live_pid(self._cell_pids[c])
+                    if self.pl_piece[q] == here:
+                        forced = q
+        if forced < 0:
+            return None
+        self.fc_forced += 1
+        if not self._consider_fits(self.placement_piece(forced), None, (forced,)):
+            self.fc_prunes += 1
+            return array("i")
+        return array("i", (forced,))
 
-        anchor, a_deg = self._select_anchor(N, occ)
-        if anchor is not None:
+    # --------------------------
+    # Decomposition (disconnected empty components)
+    # --------------------------
+    def enable_decomposition(self) -> None:
+        """
+        Cell-first: take the MRV cell from the smallest empty component inside the
+        innermost region still being filled, so each component is solved as its own
+        sub-problem and left alone once full. A component whose subtree fails before
+        it is ever filled (with no TT/refuted-state prune inside, so the failure is its own)
+        is recorded with the placed-piece set; meeting it again fails at once.
+        """
+        if not self.comp_track:
+            self.enable_component_tracking()
+        self.decompose = True
+
+    def _region_hash(self, region: int) -> int:
+        h = 0
+        occ_keys = self.occ_keys
+        while region:
+            b = region & -region
+            region ^= b
+            h ^= occ_keys[b.bit_length() - 1]
+        return h
+
+    def _decomp_focus(self) -> Optional[int]:
+        """
+        Component the frontier at this depth branches in (0 = nothing left to fill, None = some
+        component's size is not a multiple of 4, so the node is dead whether or not hole4 is on).
+        """
+        if self.comp_bad and self.exact_cover:
+            return None
+        occ = self.occ_bits
+        active = 0
+        for j in range(len(self.placements) - 1, self.root_depth - 1, -1):
+            fr = self._dframe.get(j)
+            if fr is None:
+                continue
+            if fr[0] & ~occ:
+                active = fr[0] & ~occ    # innermost region not filled yet
+                break
+            fr[3] = True
+        best, best_n = 0, 1 << 30
+        for cm in self.comp_mask.values():
+            if active and not (cm & active):
+                continue
+            n = _popcount(cm)
+            if n < best_n:
+                best, best_n = cm, n
+        return best
+
+    def _outside_prunes(self) -> int:
+        """Cuts (and forward-check forcings) that may depend on cells outside the component being filled."""
+        return self.tt_prunes + self.refuted_prunes + self.colour_prunes + self.fc_prunes + self.fc_forced
+
+    def _decomp_backtrack(self, depth: int) -> None:
+        """Frontier at depth exhausted: record its component if the failure was local to it."""
+        fr = self._dframe.pop(depth, None)
+        if fr is not None and not fr[3] and fr[2] == self._outside_prunes():
+            if len(self.comp_nogood) >= DECOMP_NOGOOD_CAP:
+                self.comp_nogood.clear()
+            self.comp_nogood.add(fr[1])
+
+    # --------------------------
+    # Colour counts
+    # --------------------------
+    def enable_colour_check(self) -> bool:
+        """
+        Drop every placement after which the empty cells' per-class colour counts are not
+        an exact sum of counts the remaining pieces can realise (see PreparedProblem.colour_table).
+        Sound: only states with no completion are cut. Returns False (and stays off) when the
+        pieces do not exactly cover the container.
+        """
+        self._colour = self.problem.colour_table()
+        self.colour_check = self._colour is not None
+        return self.colour_check
+
+    def _colour_target(self, piece_key: str) -> Tuple[int, frozenset]:
+        """(packed colour counts of the empty cells, counts coverable once piece_key is placed)."""
+        tab = self._colour
+        node = self._colour_node
+        if node is None or node[0] != self.occ_bits or node[1] != self.piece_hash:
+            empty = ~self.occ_bits
+            shift = tab["shift"]
+            left = 0
+            for c, m in enumerate(tab["masks"]):
+                left += _popcount(m & empty) << (shift * c)
+            unit, pl_piece, piece_ids = tab["unit"], self.pl_piece, self.piece_ids
+            key = tab["all_types"]
+            for pid in self.placements:
+                key -= unit[piece_ids[pl_piece[pid]]]
+            node = self._colour_node = (self.occ_bits, self.piece_hash, left, key)
+        return node[2], self.problem.colour_reach(node[3] - tab["unit"][piece_key])
+
+    # --------------------------
+    # Symmetry (container automorphisms)
+    # --------------------------
+    def enable_symmetry_breaking(self) -> int:
+        """
+        Bind the container's automorphism group and placement orbits (computed once per problem).
+        At the root only the first-ranked placement of each orbit is branched on (cell-first and
+        DLX branch there on the piece or cell with the fewest orbits), and solution_signature()
+        becomes symmetry-canonical. Returns the group order.
+        """
+        self.sym_cell_perm, self.sym_orbit = self.problem.symmetry()
+        self.symmetry_break = len(self.sym_cell_perm) > 1
+        if self.symmetry_break:
+            self.sym_root = self.problem.symmetry_root()
+        return len(self.sym_cell_perm)
+
+    def _orbit_filter(self, pids):
+        """Keep the first pid of each orbit (input order preserved)."""
+        orbit = self.sym_orbit
+        seen = set()
+        out = []
+        for q in pids:
+            o = orbit[q]
+            if o not in seen:
+                seen.add(o)
+                out.append(q)
+        return out
+
+    def solution_signature(self) -> Tuple:
+        """Order-free (piece, sorted cells) bag; minimal over the automorphisms when symmetry is on."""
+        bags = []
+        for g in (self.sym_cell_perm or [None]):
+            bag = []
+            for q in self.placements:
+                cells = self.pl_cells_t[q]
+                if g is not None:
+                    cells = [g[c] for c in cells]
+                bag.append((self.placement_piece(q), tuple(sorted(self.idx2cell[c] for c in cells))))
+            bag.sort()
+            bags.append(tuple(bag))
+        return min(bags)
+
+    # --------------------------
+    # Padded lattice bitboard (optional evaluation path)
+    # --------------------------
+    def enable_lattice_bits(self) -> None:
+        """
+        Evaluate candidates on the padded (i,j,k) bitboard (same choices as the per-cell
+        checks). The padded empty board is built from the current one, then kept across
+        _apply_place/_remove_last by XOR with each placement's padded mask.
+        """
+        self.lattice_bits = True
+        self._lat_masks = self.problem.lattice_masks()
+        self.lat_empty = self.lat_valid & ~self._lat_to_padded(self.occ_bits)
+
+    def _lat_to_padded(self, bits: int) -> int:
+        pad_bit = self.lat_pad_bit
+        out = 0
+        idx = 0
+        while bits:
+            if bits & 1:
+                out |= pad_bit[idx]
+            idx += 1
+            bits >>= 1
+        return out
+
+    def _lat_neighbor_counts(self, empty: int) -> Tuple[int, int]:
+        """(>=1 empty neighbour, >=2 empty neighbours) bitboards via 12 shift-ORs."""
+        ones = 0
+        twos = 0
+        for s in self.lat_shifts:
+            x = (empty >> s) if s > 0 else (empty << -s)
+            twos |= ones & x
+            ones |= x
+        return ones, twos
+
+    def _lat_empties_mod4_ok(self, empty: int, seeds: int) -> bool:
+        """
+        Bitboard version of _empties_mod4_ok over the components of `empty` that meet
+        `seeds`: flood each one by iterative shift-OR.
+        """
+        shifts = self.lat_shifts
+        while seeds:
+            comp = seeds & -seeds
+            edge = comp
+            while edge:
+                grown = 0
+                for s in shifts:
+                    grown |= (edge >> s) if s > 0 else (edge << -s)
+                edge = grown & empty & ~comp
+                comp |= edge
+            if _popcount(comp) & 3:
+                return False
+            seeds &= ~comp
+        return True
+
+    def _lat_hole_mod4_ok_after(self, empty: int, exposed: int, cells_idx: Tuple[int, ...]) -> bool:
+        """
+        _hole_mod4_ok_after on the bitboard (`empty` is the board after the placement): every
+        component the placement leaves of the one it lands in touches it, so the flood starts
+        from its exposed ring.
+        """
+        n = _popcount(self.comp_mask[self.comp_of[cells_idx[0]]])
+        if self.comp_bad - (1 if n & 3 else 0) > 0:
+            return False  # another component is already off
+        if (n - len(cells_idx)) & 3:
+            return False  # sizes sum to what is left of the component
+        return self._lat_empties_mod4_ok(empty, exposed)
+
+    # --------------------------
+    # Batched candidate evaluation (NumPy, optional)
+    # --------------------------
+    def enable_batch_eval(self) -> bool:
+        """
+        Evaluate candidates in NumPy batches over PreparedProblem.batch_table() (same choices
+        as the per-candidate path). Occupancy and empty-neighbour degrees are mirrored in one
+        array, BATCH_FILLED * filled + degree per cell, built from the current board and kept
+        across _apply_place/_remove_last with a single update per placement.
+        Returns False (and stays off) without NumPy.
+        """
+        if np is None:
+            return False
+        self._bt = self.problem.batch_table()
+        board = [BATCH_FILLED * ((self.occ_bits >> idx) & 1) + d for idx, d in enumerate(self.deg)]
+        self._board_np = np.array(board + [BATCH_FILLED], dtype=np.int16)
+        self.batch_eval = True
+        return True
+
+    def _batch_eval_rows(self, rows, anchor: Optional[int], k: int = 0, piece_rank=None) -> List[Tuple]:
+        """
+        Prune + score the placements `rows` (pid array) in one pass. Returns deco entries
+        already in rank order (see _rank_and_cap), only the first k when k > 0. Rows of
+        several pieces come in pid order; piece_rank (piece index -> position in self.order)
+        then breaks full ties as the per-piece scalar loop would.
+        """
+        bt = self._bt
+        board = self._board_np
+        counters = self._stats_counters
+        rows = rows[(board[bt["cells"][rows]] < BATCH_FILLED).all(axis=1)]
+        if counters:
+            self.stat_considered += len(rows)
+        if self.colour_check and len(rows):
+            pl_colour = self._colour["pl_colour"]
+            targets = {}
+            keep = []
+            for q in rows.tolist():
+                p = self.placement_piece(q)
+                if p not in targets:
+                    targets[p] = self._colour_target(p)
+                col_left, col_reach = targets[p]
+                keep.append((col_left - pl_colour[q]) in col_reach)
+            keep = np.array(keep, dtype=bool)
+            self.colour_prunes += len(rows) - int(keep.sum())
+            rows = rows[keep]
+        if not len(rows):
+            return []
+        ring = bt["ring"][rows]
+        around = board[ring]
+        empty = around < BATCH_FILLED
+        deg_after = around - bt["ringcnt"][rows]      # filled cells stay far above 1
+        iso = (deg_after == 0).any(axis=1)
+        if iso.any():
+            keep = ~iso
+            if counters:
+                self.stat_pruned_isolated += len(rows) - int(keep.sum())
+            rows, ring, empty, deg_after = rows[keep], ring[keep], empty[keep], deg_after[keep]
+
+        if self.hole_mod4 and len(rows):
+            pl_mask, pl_cells_t = self.pl_mask, self.pl_cells_t
+            if self.comp_track:
+                keep = [self._hole_mod4_ok_after(pl_mask[q], pl_cells_t[q]) for q in rows.tolist()]
+            else:
+                keep = [self._empties_mod4_ok(self.occ_bits | pl_mask[q]) for q in rows.tolist()]
+            keep = np.array(keep, dtype=bool)
+            n_cav = len(rows) - int(keep.sum())
+            if n_cav:
+                if counters:
+                    self.stat_pruned_cavity += n_cav
+                rows, ring, empty, deg_after = rows[keep], ring[keep], empty[keep], deg_after[keep]
+        if not len(rows):
+            return []
+
+        e  = empty.sum(axis=1)
+        be = (empty & bt["boundary"][ring]).sum(axis=1)
+        l  = (deg_after == 1).sum(axis=1)
+        if self._stats_full:
+            for hist, vals in ((self.stat_exposure_hist, e), (self.stat_boundary_exposure_hist, be),
+                               (self.stat_leaf_hist, l)):
+                for v, n in enumerate(np.bincount(vals).tolist()):
+                    if n:
+                        hist[v] += n
+        score = (self.EXPOSURE_WEIGHT * e) + (self.BOUNDARY_EXPOSURE_WEIGHT * be) + (self.LEAF_WEIGHT * l)
+
+        origin = bt["origin"][rows]
+        if anchor is None:
+            dist = np.zeros(len(rows), dtype=np.int64)
+        else:
+            cells = bt["cells"][rows]
+            coords = bt["coords"]
+            dist = np.abs(coords[origin] - coords[anchor]).sum(axis=1)
+            dist = np.where(bt["near"][anchor][cells].any(axis=1), -5, dist)
+            dist = np.where((cells == anchor).any(axis=1), -10, dist)
+
+        ori = bt["ori"][rows]
+        tcs = np.frombuffer(self.try_counts, dtype=np.intc)[rows]
+        keys = (ori, origin, tcs, dist, score)
+        if piece_rank is not None:
+            keys = (piece_rank[bt["piece"][rows]],) + keys
+        order = np.lexsort(keys)
+        if k > 0:
+            order = order[:k]
+        return list(zip(score[order].tolist(), dist[order].tolist(), tcs[order].tolist(),
+                        origin[order].tolist(), ori[order].tolist(), rows[order].tolist()))
+
+    def _batch_cap(self) -> int:
+        """Rows _cap_and_roulette can keep (0 = all: no cap, or the root orbit filter still has to see them)."""
+        if self.symmetry_break and not self.placements:
+            return 0
+        return self.branch_cap_cur if (self.branch_cap_cur and self.branch_cap_cur > 0) else 0
+
+    # --------------------------
+    # Build choices (ranking, cap, roulette)
+    # --------------------------
+    def _build_choices_bits(self, piece_key: str) -> array:
+        anchor, a_deg = self._select_anchor()
+        if anchor is not None and self._stats_full:
             self.anchor_seen.add(anchor)
             if self.last_anchor is not None:
                 self.transitions[(self.last_anchor, anchor)] += 1
@@ -419,26 +1680,92 @@ class SolverEngine:
         self.branch_cap_cur = self.BRANCH_CAP_TIGHT if in_corridor else self.BRANCH_CAP_OPEN
         self.roulette_cur   = "none" if in_corridor else self.ROULETTE_MODE
 
+        # Phase 1: every placement covering the anchor (one cover-index lookup)
+        deco = []
+        if anchor is not None:
+            deco = self._consider_fits(piece_key, anchor, self.cover[piece_key].get(anchor, ()))
+
+        # Fallback: any free placement (kept tight cap & no roulette in corridor)
+        if not deco:
+            if self._stats_counters:
+                self.stat_fallback_piece[piece_key] += 1
+            if self.batch_eval:
+                rows = self._bt["flat"][piece_key]
+                return self._cap_and_roulette(self._batch_eval_rows(rows, anchor, self._batch_cap()))
+            deco = self._consider_fits(piece_key, anchor, self.fits_flat[piece_key])
+
+        return self._rank_and_cap(deco)
+
+    def _consider_fits(self, piece_key: str, anchor: Optional[int], pids) -> List[Tuple]:
+        """
+        Prune + score every free placement in `pids`.
+        Returns unsorted deco entries: (score_expo, dist_score, tries, origin_idx, ori_idx, pid)
+        """
+        occ = self.occ_bits
+        pl_mask, pl_cells_t = self.pl_mask, self.pl_cells_t
+        pl_origin, pl_ori = self.pl_origin, self.pl_ori
+        neighbors = self.neighbors
+        idx2cell = self.idx2cell
+        tc = self.try_counts
+        deco = []
+
         anchor_neighbor_set = set(neighbors[anchor]) if anchor is not None else set()
 
-        def consider(origin_idx, ori_idx, mask, cells_idx):
+        comp_track = self.comp_track
+        full = self._stats_full
+        n_iso = n_cav = n_col = 0        # prunes, tallied locally (considered = kept + pruned)
+        colour = self.colour_check
+        if colour:
+            col_left, col_reach = self._colour_target(piece_key)
+            pl_colour = self._colour["pl_colour"]
+        lattice = self.lattice_bits
+        if lattice:
+            lat_empty = self.lat_empty
+            lat_boundary = self.lat_boundary
+            lat_masks = self._lat_masks
+
+        for pid in pids:
+            mask = pl_mask[pid]
+            if (occ & mask) != 0:
+                continue
+            if colour and (col_left - pl_colour[pid]) not in col_reach:
+                n_col += 1
+                continue
+            cells_idx = pl_cells_t[pid]
             occ_after = occ | mask
-            self.stat_considered += 1
-            if self._creates_isolated_empty(occ_after, cells_idx):
-                self.stat_pruned_isolated += 1
-                return
-
-            # ---- minimal addition: prune if any empty component size % 4 != 0 ----
-            if self.hole_mod4 and not self._empties_mod4_ok(occ_after):
-                self.stat_pruned_cavity += 1
-                return
-            # ----------------------------------------------------------------------
+            if lattice:
+                pm, ring, ring_out = lat_masks[pid]
+                empty = lat_empty & ~pm
+                ones, twos = self._lat_neighbor_counts(empty)
+                if empty & ring & ~ones:
+                    n_iso += 1
+                    continue
+                exposed = ring_out & empty
+                if self.hole_mod4 and not (self._lat_hole_mod4_ok_after(empty, exposed, cells_idx) if comp_track
+                                           else self._lat_empties_mod4_ok(empty, empty)):
+                    n_cav += 1
+                    continue
+                e  = _popcount(exposed)
+                be = _popcount(exposed & lat_boundary)
+                l  = _popcount(exposed & ones & ~twos)
+            else:
+                if self._creates_isolated_empty(occ_after, cells_idx):
+                    n_iso += 1
+                    continue
 
-            e, be = self._exposure_counts_after(occ_after, cells_idx)
-            l     = self._leaf_empties_after(occ_after, cells_idx)
-            self.stat_exposure_hist[e] += 1
-            self.stat_boundary_exposure_hist[be] += 1
-            self.stat_leaf_hist[l] += 1
+                # ---- minimal addition: prune if any empty component size % 4 != 0 ----
+                if self.hole_mod4 and not (self._hole_mod4_ok_after(mask, cells_idx) if comp_track
+                                           else self._empties_mod4_ok(occ_after)):
+                    n_cav += 1
+                    continue
+                # ----------------------------------------------------------------------
+
+                e, be = self._exposure_counts_after(occ_after, cells_idx)
+                l     = self._leaf_empties_after(occ_after, cells_idx)
+            if full:
+                self.stat_exposure_hist[e] += 1
+                self.stat_boundary_exposure_hist[be] += 1
+                self.stat_leaf_hist[l] += 1
             score_expo = (self.EXPOSURE_WEIGHT * e) + (self.BOUNDARY_EXPOSURE_WEIGHT * be) + (self.LEAF_WEIGHT * l)
 
             # distance / anchor tie-break
@@ -451,46 +1778,36 @@ class SolverEngine:
                     dist_score = -5
                 else:
                     ai, aj, ak = idx2cell[anchor]
-                    oi, oj, ok = idx2cell[origin_idx]
+                    oi, oj, ok = idx2cell[pl_origin[pid]]
                     dist_score = abs(ai-oi) + abs(aj-oj) + abs(ak-ok)
 
-            choices.append((score_expo, dist_score, origin_idx, ori_idx, mask, cells_idx))
+            deco.append((score_expo, dist_score, tc[pid], pl_origin[pid], pl_ori[pid], pid))
 
-        # Phase 1: try covering the anchor, if possible
-        if anchor is not None:
-            afits = fits_map.get(anchor)
-            if afits:
-                for (ori_idx, mask, cells_idx) in afits:
-                    if (occ & mask) == 0:
-                        consider(anchor, ori_idx, mask, cells_idx)
-
-        # Fallback: any origin (kept tight cap & no roulette in corridor)
-        if not choices:
-            self.stat_fallback_piece[piece_key] += 1
-            for idx in range(N):
-                if self._is_occupied(occ, idx):
-                    continue
-                pfits = fits_map.get(idx)
-                if not pfits:
-                    continue
-                for (ori_idx, mask, cells_idx) in pfits:
-                    if (occ & mask) == 0:
-                        consider(idx, ori_idx, mask, cells_idx)
+        self.colour_prunes += n_col
+        if self._stats_counters:
+            self.stat_considered += len(deco) + n_iso + n_cav + n_col
+            self.stat_pruned_isolated += n_iso
+            self.stat_pruned_cavity += n_cav
+        return deco
 
-        return self._rank_and_cap(piece_key, choices)
+    def _rank_and_cap(self, deco):
+        deco.sort(key=lambda x: (x[0], x[1], x[2], x[3], x[4]))
+        return self._cap_and_roulette(deco)
 
-    def _rank_and_cap(self, piece_key, choices):
-        if not choices:
-            self.stat_choices_hist[0] += 1
-            return []
+    def _cap_and_roulette(self, deco) -> array:
+        """
+        deco: (score, dist, tries, origin_idx, ori_idx, pid), already sorted.
+        Returns the frontier buffer: pids in reverse preference order (best is popped first).
+        """
+        if not deco:
+            if self._stats_full:
+                self.stat_choices_hist[0] += 1
+            return array("i")
 
-        tc = self.try_counts
-        deco = []
-        for score_expo, dist_score, origin_idx, ori_idx, mask, cells_idx in choices:
-            key = (piece_key, origin_idx, ori_idx)
-            deco.append((score_expo, dist_score, tc[key], origin_idx, ori_idx, mask, cells_idx))
-
-        deco.sort(key=lambda x: (x[0], x[1], x[2], x[3], x[4]))
+        # Root: symmetric copies of an opening placement lead to symmetric subtrees
+        if self.symmetry_break and not self.placements:
+            keep = set(self._orbit_filter([item[5] for item in deco]))
+            deco = [item for item in deco if item[5] in keep]
 
         k = self.branch_cap_cur if (self.branch_cap_cur and self.branch_cap_cur > 0) else len(deco)
         top = list(deco[:k])
@@ -509,44 +1826,344 @@ class SolverEngine:
         else:
             deco = top
 
-        self.stat_choices_hist[len(deco)] += 1
-        out = [(origin_idx, ori_idx, mask, cells_idx) for _,_,_, origin_idx, ori_idx, mask, cells_idx in deco]
-        return out
+        if self._stats_full:
+            self.stat_choices_hist[len(deco)] += 1
+        return array("i", [item[5] for item in reversed(deco)])
+
+    # --------------------------
+    # Cell-first MRV branching
+    # --------------------------
+    def remaining_pieces(self) -> List[str]:
+        pl_piece, piece_ids = self.pl_piece, self.piece_ids
+        used = set(piece_ids[pl_piece[pid]] for pid in self.placements)
+        return [p for p in self.order if p not in used]
+
+    def _select_mrv_cell(self, remaining: List[str], region: int = 0) -> Tuple[Optional[int], int]:
+        """
+        Empty cell with the fewest live placements over the remaining pieces (ties: lowest idx),
+        restricted to `region` when given.
+        """
+        occ = self.occ_bits
+        cover = self.cover
+        pl_mask = self.pl_mask
+        N = len(self.idx2cell)
+        best, best_n = None, 10**9
+        empty = ((1 << N) - 1) & ~occ
+        if region:
+            empty &= region
+        if self.forward_check:
+            cell_live = self.fc_cell_live
+            while empty:
+                b = empty & -empty
+                empty ^= b
+                c = b.bit_length() - 1
+                if cell_live[c] < best_n:
+                    best, best_n = c, cell_live[c]
+                    if best_n == 0:
+                        break
+            return best, (0 if best is None else best_n)
+        while empty:
+            b = empty & -empty
+            empty ^= b
+            c = b.bit_length() - 1
+            n = 0
+            for p in remaining:
+                for pid in cover[p].get(c, ()):
+                    if not (occ & pl_mask[pid]):
+                        n += 1
+                        if n >= best_n:
+                            break
+                if n >= best_n:
+                    break
+            if n < best_n:
+                best, best_n = c, n
+                if n == 0:
+                    break
+        return best, (0 if best is None else best_n)
+
+    def _build_choices_cell_first(self) -> array:
+        """Branch over every (piece, placement) covering the MRV cell; piece order is dynamic."""
+        if self.symmetry_break and not self.placements:
+            return self._build_choices_sym_root()
+        focus = 0
+        if self.decompose:
+            depth = len(self.placements)
+            focus = self._decomp_focus()
+            if focus is None:
+                self._dframe.pop(depth, None)
+                if self._stats_counters:
+                    self.stat_pruned_cavity += 1
+                return array("i")
+            if focus:
+                key = self._region_hash(focus) ^ self.piece_hash
+                self._dframe[depth] = [focus, key, self._outside_prunes(), False]
+                if key in self.comp_nogood:
+                    self.decomp_prunes += 1
+                    return array("i")
+            else:
+                self._dframe.pop(depth, None)
+        remaining = self.remaining_pieces()
+        cell, n_live = self._select_mrv_cell(remaining, focus)
+
+        self.in_corridor    = False
+        self.branch_cap_cur = 0          # complete branching at the chosen cell
+        self.roulette_cur   = self.ROULETTE_MODE
+
+        if cell is None or n_live == 0:
+            if self._stats_full:
+                self.stat_choices_hist[0] += 1
+            return array("i")
+
+        if self.batch_eval and n_live >= BATCH_MIN_ROWS:
+            bt = self._bt
+            rank = np.full(len(self.piece_ids), -1, dtype=np.intp)
+            rank[[self.piece_index[p] for p in remaining]] = np.arange(len(remaining))
+            rows = bt["cell_pids"][cell]
+            rows = rows[rank[bt["piece"][rows]] >= 0]
+            return self._cap_and_roulette(self._batch_eval_rows(rows, cell, 0, rank))
+        deco = []
+        for p in remaining:
+            deco.extend(self._consider_fits(p, cell, self.cover[p].get(cell, ())))
+        return self._rank_and_cap(deco)
+
+    def _build_choices_sym_root(self) -> array:
+        """
+        Root with symmetry breaking: every placement at self.sym_root (the piece or cell with
+        the fewest orbits), so _cap_and_roulette's orbit filter cuts the whole group.
+        """
+        self._dframe.pop(0, None)
+        self.in_corridor    = False
+        self.branch_cap_cur = 0
+        self.roulette_cur   = self.ROULETTE_MODE
+        root_piece, cell = self.sym_root
+        if root_piece is not None:
+            return self._rank_and_cap(self._consider_fits(root_piece, None, self.fits_flat[root_piece]))
+        deco = []
+        for p in self.remaining_pieces():
+            deco.extend(self._consider_fits(p, cell, self.cover[p].get(cell, ())))
+        return self._rank_and_cap(deco)
 
     # --------------------------
     # Apply / remove
     # --------------------------
-    def _apply_place(self, piece_key, origin_idx, ori_idx, mask, cells_idx):
+    def _apply_place(self, pid: int) -> None:
+        mask = self.pl_mask[pid]
+        cells_idx = self.pl_cells_t[pid]
         self.occ_bits |= mask
-        self.placements.append({
-            "piece": piece_key,
-            "origin_idx": origin_idx,
-            "ori_idx": ori_idx,
-            "mask": mask,
-            "cells_idx": tuple(cells_idx),
-        })
-        self.try_counts[(piece_key, origin_idx, ori_idx)] += 1
+        self.occ_hash ^= self.pl_zkey[pid]
+        self.piece_hash ^= self.piece_keys[self.piece_ids[self.pl_piece[pid]]]
+        self._buckets_fill(cells_idx, self.occ_bits)
+        if self.lattice_bits:
+            self.lat_empty ^= self._lat_masks[pid][0]
+        if self.batch_eval:
+            bt = self._bt
+            self._board_np[bt["step_idx"][pid]] += bt["step_delta"][pid]
+        if self.comp_track:
+            self._comp_trail.append(self._comp_fill(mask, cells_idx))
+        else:
+            self._comp_trail.append(None)
+        self._fc_trail.append(self._fc_fill(pid) if self.forward_check else None)
+        self.placements.append(pid)
+        self.try_counts[pid] += 1
+
+    def replay(self, pids) -> None:
+        """
+        Re-apply placements (e.g. reported by another process) onto this engine's board.
+        Depths replayed this way get empty frontiers: the search continues below them
+        but does not revisit their alternatives.
+        """
+        for pid in pids:
+            self._dframe.pop(len(self.placements), None)
+            self._apply_place(pid)
+            self.frontier.append(array("i"))
+            self.frontier_proof.append(False)
+        self.cursor = len(self.placements)
+        if self.cursor > self.best_depth_ever:
+            self.best_depth_ever = self.cursor
+        self.solved = self.cursor >= len(self.order)
+
+    # Search state a checkpoint carries besides the board and the TT (see checkpoint_state)
+    _CHECKPOINT_FIELDS = (
+        "order", "RNG_SEED", "hole_mod4", "cursor", "root_depth", "solved", "frontier", "frontier_proof", "try_counts",
+        "branch_cap_cur", "roulette_cur", "in_corridor",
+        "attempts", "best_depth_ever", "forced_singletons", "tt_hits", "tt_prunes", "refuted_prunes",
+        "_dframe", "comp_nogood", "decomp_prunes", "colour_prunes", "fc_prunes", "fc_forced",
+        "anchor_seen", "transitions", "last_anchor",
+        "stat_pruned_isolated", "stat_pruned_cavity", "stat_considered", "stat_fallback_piece",
+        "stat_exposure_hist", "stat_boundary_exposure_hist", "stat_leaf_hist", "stat_choices_hist",
+        "stat_anchor_deg_hist",
+    )
+
+    def checkpoint_state(self) -> Dict:
+        """
+        Picklable state to continue this search exactly (restore_state): placement ids,
+        per-depth frontiers, cursor, try counts, counters and the TT slots. Randomness
+        is re-derived from RNG_SEED and depth at each use, so there is no RNG stream.
+        TypeError for engines without checkpoint fields (DLXEngine keeps its search
+        state in the dancing-links matrix).
+        """
+        if not self._CHECKPOINT_FIELDS:
+            raise TypeError(f"{type(self).__name__} search state cannot be checkpointed")
+        state = {name: getattr(self, name) for name in self._CHECKPOINT_FIELDS}
+        state["placements"] = self.placements
+        state["elapsed"] = self.elapsed_seconds()
+        state["tt"] = self.TT.dump() if self.TT is not None else None
+        return state
+
+    def restore_state(self, state: Dict) -> None:
+        """
+        Continue a checkpointed search on a fresh engine built from the same problem and
+        settings. TT contents are restored when the table has the same size.
+        """
+        if self.placements:
+            raise ValueError("restore_state needs a fresh engine")
+        self.order = tuple(state["order"])
+        self.replay(state["placements"])   # board, hashes, buckets, components
+        for name in self._CHECKPOINT_FIELDS:
+            setattr(self, name, state[name])
+        self._t0 = time.time() - state["elapsed"]
+        if state["tt"] is not None and self.TT is not None:
+            self.TT.load(state["tt"])
+
+    def seed_prefix(self, pids) -> None:
+        """Start from a placement prefix (a work unit): search only the subtree below it."""
+        self.replay(pids)
+        self.root_depth = len(self.placements)
+
+    def resume_after_solution(self) -> None:
+        """Step back from a full placement so step_once continues with its siblings."""
+        self.solved = False
+        for fr in self._dframe.values():
+            fr[3] = True   # every component on the path was filled
+        self.frontier_proof = [False] * len(self.frontier)   # no ancestor is refuted
+        if self.cursor > self.root_depth:
+            self.cursor -= 1
+            self._remove_last()
+
+    def split_prefixes(self, split_depth: int) -> List[List[int]]:
+        """
+        Expand the frontier to split_depth (same ranking/caps/pruning as the search) and
+        return every open prefix in frontier order. Prefixes that end earlier because
+        the board is full are returned as well. Leaves the engine at its start state.
+        """
+        out: List[List[int]] = []
+        base = len(self.placements)
+        dframe = {d: list(fr) for d, fr in self._dframe.items()}
+
+        def expand(cursor: int) -> None:
+            if cursor - base >= split_depth or cursor >= len(self.order):
+                out.append(list(self.placements))
+                return
+            self._build_frontier_for_depth(cursor)
+            choices = self.frontier.pop()
+            self.frontier_proof.pop()
+            for pid in reversed(choices):
+                self._apply_place(pid)
+                self.cursor = cursor + 1
+                expand(cursor + 1)
+                self._remove_last()
+            self.cursor = cursor
+
+        expand(self.cursor)
+        self._dframe = dframe
+        return out
+
+    def steal_shallowest(self) -> List[List[int]]:
+        """
+        Give away the untried tail of the shallowest non-empty frontier buffer: the
+        first half (the choices this engine would reach last), as prefixes.
+        """
+        top = min(len(self.frontier), self.cursor + 1)
+        for d in range(self.root_depth, top):
+            buf = self.frontier[d]
+            if buf:
+                k = (len(buf) + 1) // 2
+                stolen = buf[:k]
+                del buf[:k]
+                self.frontier_proof[d] = False   # searched elsewhere
+                head = list(self.placements[:d])
+                return [head + [pid] for pid in stolen]
+        return []
+
+    def knuth_probe(self, rng: random.Random) -> List[int]:
+        """
+        One uniformly random root-to-leaf walk through the tree this engine searches
+        (same choice builder, caps and pruning; the TT is not consulted). Returns the
+        branching factor at each depth, ending in 0 at a dead end; Knuth's unbiased
+        estimate of the node count at depth d is prod(factors[:d]). Leaves the board,
+        frontier and try counts as they were.
+        """
+        base, cursor0 = len(self.placements), self.cursor
+        dframe = {d: list(fr) for d, fr in self._dframe.items()}
+        factors: List[int] = []
+        cursor = cursor0
+        while cursor < len(self.order):
+            self.cursor = cursor
+            self._build_frontier_for_depth(cursor)
+            choices = self.frontier.pop()
+            self.frontier_proof.pop()
+            factors.append(len(choices))
+            if not choices:
+                break
+            self._apply_place(choices[rng.randrange(len(choices))])
+            cursor += 1
+        while len(self.placements) > base:
+            self.try_counts[self._remove_last()] -= 1
+        self.cursor = cursor0
+        self._dframe = dframe
+        return factors
 
     def _remove_last(self):
         if not self.placements:
             return None
-        pl = self.placements.pop()
-        self.occ_bits &= ~pl["mask"]
-        return pl
+        pid = self.placements.pop()
+        undo = self._comp_trail.pop()
+        killed = self._fc_trail.pop()
+        self.occ_bits &= ~self.pl_mask[pid]
+        self.occ_hash ^= self.pl_zkey[pid]
+        self.piece_hash ^= self.piece_keys[self.piece_ids[self.pl_piece[pid]]]
+        self._buckets_clear(self.pl_cells_t[pid], self.occ_bits)
+        if self.lattice_bits:
+            self.lat_empty ^= self._lat_masks[pid][0]
+        if self.batch_eval:
+            bt = self._bt
+            self._board_np[bt["step_idx"][pid]] -= bt["step_delta"][pid]
+        if self.comp_track:
+            if undo is not None:
+                self._comp_unfill(undo)
+            else:
+                self._comp_rebuild()  # placed before tracking was enabled
+        if self.forward_check:
+            if killed is not None:
+                self._fc_unfill(killed)
+            else:
+                self._fc_rebuild()    # placed before forward checking was enabled
+        return pid
 
     # --------------------------
     # Frontier build (DEFENSIVE)
     # --------------------------
     def _build_frontier_for_depth(self, cursor: int) -> None:
         """
-        Build the deque of choices for the current depth if needed.
+        Build the choice buffer (placement ids, best last) for the current depth if needed.
         Defensive: if cursor is at/after end of order, do nothing.
         """
         if cursor >= len(self.order):
             return
-        piece_key = self.order[cursor]
-        choices = self._build_choices_bits(piece_key)
-        self.frontier.append(deque(choices))
+        if self.forward_check:
+            choices = self._fc_frontier()
+            if choices is not None:
+                self.frontier.append(choices)
+                self.frontier_proof.append(self.exact_cover)   # dead or forced
+                return
+        if self.branching == "cell-first":
+            choices = self._build_choices_cell_first()
+            complete = self.exact_cover     # every placement covering the MRV cell
+        else:
+            choices = self._build_choices_bits(self.order[cursor])
+            complete = False                # anchor restriction and branch caps
+        self.frontier.append(choices)
+        self.frontier_proof.append(complete)
 
     # --------------------------
     # One search step (+ forced-singletons)
@@ -571,15 +2188,19 @@ class SolverEngine:
                 self.best_depth_ever = self.placed_count()
             return True, True
 
-        # TT prune?
-        if self._tt_should_prune():
+        # Proven dead, or TT prune?
+        refuted = self._refuted_prune()
+        if refuted or self._tt_should_prune():
             # Backtrack immediately
-            if self.cursor == 0:
+            if self.cursor <= self.root_depth:
                 return False, False
             if len(self.frontier) > self.cursor:
                 self.frontier.pop()
+                self.frontier_proof.pop()
             self.cursor -= 1
             self._remove_last()
+            if not refuted:
+                self.frontier_proof[self.cursor] = False   # a heuristic cut proves nothing
             return True, False
 
         # Build frontier if needed (defensive)
@@ -602,25 +2223,31 @@ class SolverEngine:
 
             d = self.frontier[self.cursor]
             if not d:
+                if self.decompose:
+                    self._decomp_backtrack(self.cursor)
+                proof = self.frontier_proof[self.cursor]
+                if proof:
+                    self._refuted_record()
                 # backtrack
-                if self.cursor == 0:
+                if self.cursor <= self.root_depth:
                     # update best depth ever even on failure forward
                     if self.placed_count() > self.best_depth_ever:
                         self.best_depth_ever = self.placed_count()
                     return progressed, False
                 if len(self.frontier) > self.cursor:
                     self.frontier.pop()
+                    self.frontier_proof.pop()
                 self.cursor -= 1
                 self._remove_last()
+                if not proof:
+                    self.frontier_proof[self.cursor] = False
                 progressed = True
                 # record backtrack position in TT
                 self._tt_record()
                 break
 
             if len(d) == 1:
-                origin_idx, ori_idx, mask, cells_idx = d.popleft()
-                piece_key = self.order[self.cursor]
-                self._apply_place(piece_key, origin_idx, ori_idx, mask, cells_idx)
+                self._apply_place(d.pop())
                 self.cursor += 1
                 self.forced_singletons += 1
                 if len(self.frontier) <= self.cursor:
@@ -628,9 +2255,7 @@ class SolverEngine:
                 progressed = True
                 continue
             else:
-                origin_idx, ori_idx, mask, cells_idx = d.popleft()
-                piece_key = self.order[self.cursor]
-                self._apply_place(piece_key, origin_idx, ori_idx, mask, cells_idx)
+                self._apply_place(d.pop())
                 self.cursor += 1
                 progressed = True
                 break
@@ -640,3 +2265,244 @@ class SolverEngine:
             self.best_depth_ever = self.placed_count()
 
         return progressed, False
+
+    def run(self, max_steps: int = 4096, deadline: Optional[float] = None,
+            stop_on_best: bool = True) -> RunResult:
+        """
+        Call step_once() up to max_steps times in a tight loop, so callers do their
+        bookkeeping once per batch. Stops after the step that solves, the first step
+        that makes no progress, the step that raises best_depth_ever (stop_on_best),
+        or once time.monotonic() passes `deadline` (read every RUN_CLOCK_STRIDE steps).
+        """
+        step = self.step_once
+        clock = time.monotonic
+        best0 = self.best_depth_ever
+        n = 0
+        while n < max_steps:
+            progressed, solved = step()
+            n += 1
+            if solved or not progressed:
+                return RunResult(n, solved, self.best_depth_ever > best0, not solved)
+            if stop_on_best and self.best_depth_ever > best0:
+                return RunResult(n, False, True, False)
+            if deadline is not None and n % RUN_CLOCK_STRIDE == 0 and clock() >= deadline:
+                break
+        return RunResult(n, False, self.best_depth_ever > best0, False)
+
+
+class DLXEngine(SolverEngine):
+    """
+    Exact-cover backend (Knuth's Algorithm X with dancing links, MRV column choice).
+
+    Columns: one per container cell + one per piece. Rows: every fit from
+    _precompute_fits. Piece columns are primary when the container has exactly
+    4 cells per piece, secondary (at most once) otherwise.
+
+    Same driver surface as SolverEngine (step_once / placements / best_depth_ever /
+    placed_count / total_pieces / occ_bits). One step_once = one placement or one
+    backtrack to the next untried row. The search is iterative (explicit stack),
+    so it can be interrupted and resumed between steps. Row order inside each
+    column is shuffled from RNG_SEED, so different seeds reach different solutions.
+    """
+
+    _CHECKPOINT_FIELDS = ()   # search state lives in the matrix: not checkpointable
+
+    def __init__(self, pieces=None, valid_set=None, **kwargs):
+        # exact search: no heuristic TT, nothing to refute
+        kwargs.update(tt_mb=0, refuted=None)
+        super().__init__(pieces, valid_set, **kwargs)
+        self.exhausted = False
+        self._dlx_built = False
+        self.dlx_stack: List[Tuple[int, int]] = []   # (column, selected row node)
+        self._dlx_root_seen: Set[int] = set()         # orbits already opened at the root (symmetry)
+
+    # --------------------------
+    # Matrix
+    # --------------------------
+    def _dlx_build(self) -> None:
+        N = len(self.idx2cell)
+        piece_keys = list(self.order)
+        piece_col = {p: N + 1 + i for i, p in enumerate(piece_keys)}
+        n_cols = N + len(piece_keys)
+        pieces_primary = (N == 4 * len(piece_keys))
+
+        rows = list(range(self.n_placements))   # row r -> placement id
+        random.Random(self.RNG_SEED).shuffle(rows)
+
+        # headers 0..n_cols (0 = root)
+        L = list(range(n_cols + 1))
+        R = list(range(n_cols + 1))
+        U = list(range(n_cols + 1))
+        D = list(range(n_cols + 1))
+        C = list(range(n_cols + 1))
+        S = [0] * (n_cols + 1)
+        row_of = [-1] * (n_cols + 1)
+
+        primary = list(range(1, N + 1))
+        if pieces_primary:
+            primary += [piece_col[p] for p in piece_keys]
+        prev = 0
+        for c in primary:
+            R[prev] = c
+            L[c] = prev
+            prev = c
+        R[prev] = 0
+        L[0] = prev
+
+        for r, pid in enumerate(rows):
+            first = -1
+            for c in [ci + 1 for ci in self.pl_cells_t[pid]] + [piece_col[self.placement_piece(pid)]]:
+                x = len(C)
+                C.append(c)
+                row_of.append(r)
+                # vertical: append at bottom of column c
+                U.append(U[c])
+                D.append(c)
+                D[U[c]] = x
+                U[c] = x
+                S[c] += 1
+                # horizontal: circular row list
+                if first < 0:
+                    first = x
+                    L.append(x)
+                    R.append(x)
+                else:
+                    L.append(L[first])
+                    R.append(first)
+                    R[L[first]] = x
+                    L[first] = x
+
+        self.dlx_rows = rows
+        self.dlx_L, self.dlx_R, self.dlx_U, self.dlx_D = L, R, U, D
+        self.dlx_C, self.dlx_S, self.dlx_row_of = C, S, row_of
+        root_piece, cell = self.sym_root
+        self._dlx_root_col = piece_col[root_piece] if root_piece is not None else cell + 1
+        self._dlx_built = True
+
+    def _dlx_cover(self, c: int) -> None:
+        L, R, U, D, C, S = self.dlx_L, self.dlx_R, self.dlx_U, self.dlx_D, self.dlx_C, self.dlx_S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _dlx_uncover(self, c: int) -> None:
+        L, R, U, D, C, S = self.dlx_L, self.dlx_R, self.dlx_U, self.dlx_D, self.dlx_C, self.dlx_S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _dlx_select(self, r: int) -> None:
+        R, C = self.dlx_R, self.dlx_C
+        j = R[r]
+        while j != r:
+            self._dlx_cover(C[j])
+            j = R[j]
+        self._apply_place(self.dlx_rows[self.dlx_row_of[r]])
+        self.cursor = len(self.placements)
+
+    def _dlx_unselect(self, r: int) -> None:
+        L, C = self.dlx_L, self.dlx_C
+        self._remove_last()
+        self.cursor = len(self.placements)
+        j = L[r]
+        while j != r:
+            self._dlx_uncover(C[j])
+            j = L[j]
+
+    def _dlx_choose_column(self) -> int:
+        R, S = self.dlx_R, self.dlx_S
+        best = -1
+        best_s = 10**9
+        c = R[0]
+        while c != 0:
+            s = S[c]
+            if s < best_s:
+                best, best_s = c, s
+                if s <= 1:
+                    break
+            c = R[c]
+        return best
+
+    def _dlx_backtrack(self) -> bool:
+        """Advance to the next untried row; False when the whole tree is exhausted."""
+        stack = self.dlx_stack
+        D = self.dlx_D
+        while stack:
+            c, r = stack.pop()
+            self._dlx_unselect(r)
+            r = D[r]
+            if self.symmetry_break and not stack:
+                # root column: skip rows symmetric to one already explored
+                while r != c and self.sym_orbit[self.dlx_rows[self.dlx_row_of[r]]] in self._dlx_root_seen:
+                    r = D[r]
+                if r != c:
+                    self._dlx_root_seen.add(self.sym_orbit[self.dlx_rows[self.dlx_row_of[r]]])
+            if r != c:
+                self._dlx_select(r)
+                stack.append((c, r))
+                return True
+            self._dlx_uncover(c)
+        self.exhausted = True
+        return False
+
+    # --------------------------
+    # One search step
+    # --------------------------
+    def step_once(self):
+        """
+        Returns (progressed: bool, solved: bool)
+        """
+        if self.dirty or self.solved or self.exhausted:
+            return False, self.solved
+        if not self._dlx_built:
+            self._dlx_build()
+
+        self.attempts += 1
+
+        if self.dlx_R[0] == 0:
+            self.solved = True
+            if self.placed_count() > self.best_depth_ever:
+                self.best_depth_ever = self.placed_count()
+            return True, True
+
+        dead = False
+        if self.hole_mod4 and not self._empties_mod4_ok_now():
+            if self._stats_counters:
+                self.stat_pruned_cavity += 1
+            dead = True
+
+        if not dead:
+            if self.symmetry_break and not self.dlx_stack:
+                c = self._dlx_root_col      # fewest orbits, not fewest rows (see PreparedProblem.symmetry_root)
+            else:
+                c = self._dlx_choose_column()
+            if self.dlx_S[c] > 0:
+                if self.dlx_S[c] == 1:
+                    self.forced_singletons += 1
+                self._dlx_cover(c)
+                r = self.dlx_D[c]
+                if self.symmetry_break and not self.dlx_stack:
+                    self._dlx_root_seen.add(self.sym_orbit[self.dlx_rows[self.dlx_row_of[r]]])
+                self._dlx_select(r)
+                self.dlx_stack.append((c, r))
+                if self.placed_count() > self.best_depth_ever:
+                    self.best_depth_ever = self.placed_count()
+                return True, False
+
+        return self._dlx_backtrack(), False
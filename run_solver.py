@@ -3,34 +3,56 @@
 from pathlib import Path
 import sys, os, runpy
 
-repo = Path(__file__).resolve().parent
-solver = repo / "external" / "solver" / "solver.py"
-if not solver.exists():
-    sys.stderr.write(f"Solver not found: {solver}\n")
-    sys.exit(2)
-
-# Find the container: first token that isn't an option (doesn't start with '-')
-args = sys.argv[1:]
-container = None
-rest = []
-for tok in args:
-    if container is None and not tok.startswith("-"):
-        container = tok
-    else:
-        rest.append(tok)
-
-if container is None:
-    sys.stderr.write("Usage: run_solver.py <container.json> [args...]\n")
-    sys.exit(2)
-
-# Resolve container BEFORE changing cwd
-container_abs = str((Path.cwd() / container).resolve())
-
-# Run from the solver folder so relative paths behave
-os.chdir(str(solver.parent))
-
-# Build argv for the real solver: [solver.py, container, ...flags...]
-sys.argv = [str(solver), container_abs] + rest
-
-# Execute solver.py as __main__
-runpy.run_path(str(solver), run_name="__main__")
+def main():
+    repo = Path(__file__).resolve().parent
+    solver = repo / "external" / "solver" / "solver.py"
+    if not solver.exists():
+        sys.stderr.write(f"Solver not found: {solver}\n")
+        sys.exit(2)
+
+    # Find the container: first token that isn't an option (doesn't start with '-').
+    # --resume PATH takes the container from the checkpoint instead.
+    args = sys.argv[1:]
+    container = None
+    resume = None
+    rest = []
+    i = 0
+    while i < len(args):
+        tok = args[i]
+        if tok == "--resume" and i + 1 < len(args):
+            resume = args[i + 1]
+            i += 2
+            continue
+        if tok.startswith("--resume="):
+            resume = tok.split("=", 1)[1]
+        elif container is None and not tok.startswith("-"):
+            container = tok
+        else:
+            rest.append(tok)
+        i += 1
+
+    if container is None and resume is None:
+        sys.stderr.write("Usage: run_solver.py <container.json> [args...]\n"
+                         "       run_solver.py --resume <checkpoint> [args...]\n")
+        sys.exit(2)
+
+    # Resolve paths BEFORE changing cwd
+    head = []
+    if container is not None:
+        head.append(str((Path.cwd() / container).resolve()))
+    if resume is not None:
+        head += ["--resume", str((Path.cwd() / resume).resolve())]
+
+    # Run from the solver folder so relative paths behave
+    os.chdir(str(solver.parent))
+
+    # Build argv for the real solver: [solver.py, container and/or --resume PATH, ...flags...]
+    sys.argv = [str(solver)] + head + rest
+
+    # Execute solver.py as __main__
+    runpy.run_path(str(solver), run_name="__main__")
+
+
+# Guarded: the solver's --jobs workers use the spawn start method, which re-imports this file
+if __name__ == "__main__":
+    main()